@@ -0,0 +1,106 @@
+"""
+Import benchmark: scales up مقترح12_timetable.csv and times the FET importer.
+Compares the old DictReader + alias-chain row extraction with the header-resolved
+tuple reader used by DataManager, sequential vs process-pool multi-file import,
+an incremental re-import after one file changed, startup from a snapshot,
+building every timetable grid from the slot index, and the idle-gap analysis.
+Run: python bench_import.py [scale]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from core.data_manager import DataManager
+from core.fet_csv import read_fet_rows
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'مقترح12_timetable.csv')
+
+
+def write_scaled_csv(scale, directory, name='scaled'):
+    with open(SAMPLE, encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+    header, rows = lines[0], [ln for ln in lines[1:] if ln.strip()]
+    path = os.path.join(directory, f'{name}_x{scale}_timetable.csv')
+    with open(path, 'w', encoding='utf-8-sig') as out:
+        out.write(header + '\n')
+        for _ in range(scale):
+            out.write('\n'.join(rows))
+            out.write('\n')
+    return path, len(rows) * scale
+
+
+def extract_dictreader(path):
+    """Row extraction as done before the header schema resolver."""
+    n = 0
+    with open(path, encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            act_id = (row.get('Activity Id') or row.get('ActivityId') or row.get('ID') or '')
+            day_raw = row.get('Day') or row.get('day') or row.get('اليوم') or ''
+            hour_raw = row.get('Hour') or row.get('Period') or row.get('الساعة') or ''
+            subject = (row.get('Subject') or row.get('subject') or row.get('المادة') or '').strip()
+            teachers_raw = (row.get('Teachers') or row.get('Teacher') or row.get('الأستاذ') or '').strip()
+            students_set = (row.get('Students Sets') or row.get('Students') or row.get('Classe') or row.get('الصف') or '').strip()
+            room = (row.get('Room') or row.get('Classroom') or row.get('القاعة') or '').strip()
+            duration = row.get('Duration') if 'Duration' in row else None
+            # counted, so the extracted values are used like in the importer
+            n += len((act_id, day_raw, hour_raw, subject, teachers_raw, students_set, room, duration))
+    return n
+
+
+def extract_schema(path):
+    n = 0
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for _row_num, (act_id, day_raw, hour_raw, subject, teachers_raw, students_set, room,
+                       duration) in read_fet_rows(f):
+            subject = subject.strip()
+            teachers_raw = teachers_raw.strip()
+            students_set = students_set.strip()
+            room = room.strip()
+            n += len((act_id, day_raw, hour_raw, subject, teachers_raw, students_set, room, duration))
+    return n
+
+
+def timed(label, fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    dt = time.perf_counter() - t0
+    print(f'{label:<32} {dt * 1000:9.1f} ms')
+    return dt, result
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        path, rows = write_scaled_csv(scale, tmp)
+        print(f'{rows} rows ({scale}x {os.path.basename(SAMPLE)})')
+        old, _ = timed('extract: DictReader + aliases', extract_dictreader, path)
+        new, _ = timed('extract: header schema tuples', extract_schema, path)
+        print(f'extraction speed-up: {old / new:.2f}x')
+        dm = DataManager()
+        dt, _ = timed('full import', dm.import_fet_activities_csv_files, [path])
+        print(f'full import: {rows / dt:,.0f} rows/s')
+        timed('all teacher + class grids', lambda: ([dm.build_teacher_grid(t) for t in dm.timetable_data],
+                                                    [dm.build_class_grid(c) for c in dm.classes_timetable]))
+        timed('idle gaps, teachers + classes', dm.schedule_shapes)
+
+        files = [write_scaled_csv(max(1, scale // 4), tmp, f'proposal{i:02d}')[0] for i in range(4)]
+        seq, _ = timed('4 files, sequential', DataManager().import_fet_activities_csv_files, files, 1)
+        dm = DataManager()
+        par, _ = timed('4 files, process pool', dm.import_fet_activities_csv_files, files)
+        print(f'multi-file speed-up: {seq / par:.2f}x')
+
+        small = write_scaled_csv(1, tmp, 'corrected')[0]
+        dm.import_fet_activities_csv_files(files + [small])
+        with open(small, 'a', encoding='utf-8') as f:
+            f.write('"9999","09 الخميس ص","2","4M1","لغة عربية","الأستاذة شنق عربية1","","S2",""\n')
+        timed('re-import, 1 small file changed', dm.import_fet_activities_csv_files, files + [small])
+
+        dm.save_snapshot(os.path.join(tmp, 'snapshot.bin'))
+        fresh = DataManager(snapshot_path=os.path.join(tmp, 'snapshot.bin'))
+        timed('startup from snapshot', fresh.load_snapshot)
+
+
+if __name__ == '__main__':
+    main()
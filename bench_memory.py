@@ -0,0 +1,55 @@
+"""
+Memory benchmark: per-activity footprint of the imported timetable.
+Imports a scaled-up مقترح12_timetable.csv (~100k activities by default) and
+compares the retained size of DataManager's columnar activity store with the
+dict-per-activity layout it replaced (an 11-key dict per teacher session plus
+a 13-key copy per class session).
+Run: python bench_memory.py [scale]
+"""
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from bench_import import write_scaled_csv
+from core.data_manager import DataManager
+
+
+def as_dicts(view):
+    # fresh string copies, like the per-row strings csv.DictReader produced
+    return {key: [{k: (v.encode().decode() if isinstance(v, str) else v) for k, v in a.items()} for a in acts]
+            for key, acts in view.items()}
+
+
+def build_dict_layout(dm):
+    """Rebuild timetable_data/classes_timetable the way the importer used to."""
+    return as_dicts(dm.timetable_data), as_dicts(dm.classes_timetable)
+
+
+def retained(fn, *args):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn(*args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 141
+    with tempfile.TemporaryDirectory() as tmp:
+        path, _rows = write_scaled_csv(scale, tmp)
+        dm = DataManager()
+        new_bytes, _ = retained(dm.import_fet_activities_csv_files, [path], 1)
+        n = sum(len(v) for v in dm.timetable_data.values())
+        old_bytes, _old = retained(build_dict_layout, dm)
+        print(f'{n} activities ({sum(len(v) for v in dm.classes_timetable.values())} in class views)')
+        print(f'dict per activity : {old_bytes / 1e6:8.1f} MB  {old_bytes / n:7.0f} B/activity')
+        print(f'columnar store    : {new_bytes / 1e6:8.1f} MB  {new_bytes / n:7.0f} B/activity')
+        print(f'reduction         : {old_bytes / new_bytes:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
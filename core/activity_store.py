@@ -0,0 +1,250 @@
+"""Compact columnar storage for imported activities.
+
+An imported session used to be an 11-key dict, plus a 13-key copy for the
+class timetable, each holding its own copies of strings that repeat on every
+row. ``ActivityTable`` stores one row per (activity, teacher) as typed arrays:
+small integers directly, strings as codes into a shared ``StringPool``.
+``ActivityRecord`` is the thin dict-shaped adapter over one row, and
+``ActivityView`` is the per-teacher/per-class list of row ids that
+``timetable_data``/``classes_timetable`` hold, so existing readers keep working
+and both views see every change made to a row. ``Activity`` is the detached,
+typed form of one row that the streaming importer yields.
+"""
+from __future__ import annotations
+from array import array
+from collections.abc import Mapping, Sequence
+from sys import intern
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# dict keys exposed by teacher-view records, in the order the importer always used
+ACTIVITY_FIELDS: Tuple[str, ...] = (
+    'weekday', 'start_hour', 'duration', 'subject', 'room', 'class', 'activity_id',
+    'source_file', 'original_hour_field', 'original_day_field', 'period',
+)
+# class-view records also carry the teacher and the raw (group) class label
+CLASS_ACTIVITY_FIELDS: Tuple[str, ...] = ACTIVITY_FIELDS + ('teacher', 'original_class')
+
+INT_COLUMNS: Tuple[str, ...] = ('weekday', 'start_hour', 'duration')
+STR_COLUMNS: Tuple[str, ...] = ('subject', 'room', 'class_', 'activity_id', 'source_file',
+                                'original_hour_field', 'original_day_field', 'period', 'teacher')
+# stored in int columns for None
+NONE_INT = -1
+
+# record key -> (column attribute, is string column)
+_COLUMN_OF: Dict[str, Tuple[str, bool]] = {
+    'weekday': ('weekday', False), 'start_hour': ('start_hour', False), 'duration': ('duration', False),
+    'subject': ('subject', True), 'room': ('room', True), 'class': ('class_', True),
+    'activity_id': ('activity_id', True), 'source_file': ('source_file', True),
+    'original_hour_field': ('original_hour_field', True), 'original_day_field': ('original_day_field', True),
+    'period': ('period', True), 'teacher': ('teacher', True), 'original_class': ('class_', True),
+}
+
+
+class Activity(NamedTuple):
+    """One normalized session of one teacher, as streamed from a FET CSV."""
+    teacher: str                   # canonical teacher ID (teacher_key() inside import workers)
+    weekday: Optional[int]         # 0=Monday .. 6=Sunday; None if the Day field was not understood
+    start_hour: Optional[int]
+    duration: int
+    subject: str
+    room: str
+    class_: str                    # raw Students Sets label, e.g. '4M1_G1'
+    main_class: Optional[str]      # real class it belongs to ('4M1'), None for other groups
+    activity_id: Optional[str]
+    period: Optional[str]          # 'morning' / 'afternoon' from the Day label
+    source_file: str
+    row_num: int                   # data row number, 1 = first row after the header
+    original_day_field: str
+    original_hour_field: str
+    teacher_spelling: str          # the teacher as written in the CSV
+
+
+def _restore_pool(strings: List[Optional[str]]) -> 'StringPool':
+    return StringPool([None] + [intern(s) for s in strings[1:]])
+
+
+class StringPool:
+    """Interned strings and their integer codes; code 0 is always None."""
+
+    __slots__ = ('strings', 'codes')
+
+    def __init__(self, strings: Optional[List[Optional[str]]] = None):
+        self.strings: List[Optional[str]] = [None] if strings is None else strings
+        self.codes: Dict[Optional[str], int] = dict(zip(self.strings, range(len(self.strings))))
+
+    def code(self, s: Optional[str]) -> int:
+        c = self.codes.get(s)
+        if c is None:
+            s = intern(s)
+            c = self.codes[s] = len(self.strings)
+            self.strings.append(s)
+        return c
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __reduce__(self):
+        # strings are re-interned on load so pools from worker processes share objects
+        return (_restore_pool, (self.strings,))
+
+
+class ActivityTable:
+    """Struct-of-arrays activity table; a row is addressed by its integer index."""
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.pool = pool if pool is not None else StringPool()
+        for name in INT_COLUMNS:
+            setattr(self, name, array('i'))
+        for name in STR_COLUMNS:
+            setattr(self, name, array('I'))
+
+    def __len__(self) -> int:
+        return len(self.weekday)
+
+    def append(self, weekday: Optional[int], start_hour: Optional[int], duration: int, subject: str,
+               room: str, class_: str, activity_id: Optional[str], source_file: str,
+               original_hour_field: str, original_day_field: str, period: Optional[str],
+               teacher: str) -> int:
+        code = self.pool.code
+        row = len(self.weekday)
+        self.weekday.append(NONE_INT if weekday is None else weekday)
+        self.start_hour.append(NONE_INT if start_hour is None else start_hour)
+        self.duration.append(duration)
+        self.subject.append(code(subject))
+        self.room.append(code(room))
+        self.class_.append(code(class_))
+        self.activity_id.append(code(activity_id))
+        self.source_file.append(code(source_file))
+        self.original_hour_field.append(code(original_hour_field))
+        self.original_day_field.append(code(original_day_field))
+        self.period.append(code(period))
+        self.teacher.append(code(teacher))
+        return row
+
+    def extend(self, other: 'ActivityTable', start: int = 0, stop: Optional[int] = None) -> int:
+        """Append rows ``start:stop`` of ``other``, re-coding its strings into
+        this table's pool. Returns the id of the first appended row."""
+        stop = len(other) if stop is None else stop
+        base = len(self)
+        for name in INT_COLUMNS:
+            getattr(self, name).extend(getattr(other, name)[start:stop])
+        slices = [(getattr(self, name), getattr(other, name)[start:stop]) for name in STR_COLUMNS]
+        if other.pool is self.pool:
+            for target, codes in slices:
+                target.extend(codes)
+            return base
+        used = set()
+        for _target, codes in slices:
+            used.update(codes)
+        strings, code = other.pool.strings, self.pool.code
+        remap = {c: code(strings[c]) for c in used}
+        for target, codes in slices:
+            target.extend(map(remap.__getitem__, codes))
+        return base
+
+    def get(self, row: int, key: str) -> Any:
+        column, is_str = _COLUMN_OF[key]
+        v = getattr(self, column)[row]
+        if is_str:
+            return self.pool.strings[v]
+        return None if v == NONE_INT else v
+
+    def set(self, row: int, key: str, value: Any) -> None:
+        column, is_str = _COLUMN_OF[key]
+        if is_str:
+            value = self.pool.code(value)
+        elif value is None:
+            value = NONE_INT
+        getattr(self, column)[row] = value
+
+
+class ActivityRecord(Mapping):
+    """Read-only dict-shaped view of one table row, as found in ``timetable_data``.
+    Edits go through ``DataManager.update_activity`` so the indexes follow."""
+
+    __slots__ = ('table', 'row')
+    _fields: Tuple[str, ...] = ACTIVITY_FIELDS
+    _keys = frozenset(ACTIVITY_FIELDS)
+
+    def __init__(self, table: ActivityTable, row: int):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return self.table.get(self.row, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise TypeError("activity records are read-only; use DataManager.update_activity(record.row, ...)")
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("activity fields cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._keys:
+            return default
+        return self.table.get(self.row, key)
+
+    def copy(self) -> Dict[str, Any]:
+        """Detached plain-dict copy, as ``dict.copy()`` used to give."""
+        return dict(self.items())
+
+    __hash__ = None  # the row can change under it, like the dicts it replaces
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+
+class ClassActivityRecord(ActivityRecord):
+    """Row as listed in ``classes_timetable``; adds ``teacher`` and ``original_class``."""
+
+    __slots__ = ()
+    _fields = CLASS_ACTIVITY_FIELDS
+    _keys = frozenset(CLASS_ACTIVITY_FIELDS)
+
+
+class ActivityView(Sequence):
+    """Ordered row ids of one teacher or class; rows are wrapped in records on access."""
+
+    __slots__ = ('table', 'ids', 'record_type')
+
+    def __init__(self, table: ActivityTable, ids: array, record_type: type = ActivityRecord):
+        self.table = table
+        self.ids = ids
+        self.record_type = record_type
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.record_type(self.table, row) for row in self.ids[i]]
+        return self.record_type(self.table, self.ids[i])
+
+    def __iter__(self) -> Iterator[ActivityRecord]:
+        record_type, table = self.record_type, self.table
+        for row in self.ids:
+            yield record_type(table, row)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (ActivityView, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, (self.table, self.ids, self.record_type))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self.ids)} activities)"
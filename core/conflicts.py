@@ -0,0 +1,72 @@
+"""Double-booking detection over the per-slot index.
+
+A slot of a teacher or room conflicts when it holds two different activities.
+A class slot conflicts when two different activities meet overlapping parts of
+the class: the whole class overlaps everything, ``_G1`` only overlaps ``_G1``
+(so 4M1_G1 and 4M1_G2 in parallel is fine, 4M1 with 4M1_G1 is not).
+Rows of the same activity (one per teacher, same file and Activity Id) never
+conflict with each other.
+"""
+from __future__ import annotations
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.activity_store import ActivityTable
+from core.occupancy import HOURS_PER_DAY
+
+GROUP_SUFFIXES = ('_G1', '_G2')
+
+# label shown in the UI for each conflict kind
+CONFLICT_KINDS: Dict[str, str] = {
+    'teacher': 'أستاذ في مكانين',
+    'room': 'قاعة مستعملة مرتين',
+    'class': 'قسم بحصتين',
+}
+
+
+class Conflict(NamedTuple):
+    kind: str                # 'teacher', 'room' or 'class'
+    entity: str              # teacher ID, room or main class
+    weekday: int
+    hour: int
+    rows: Tuple[int, ...]    # activity table rows sharing the slot, in timetable order
+
+
+def group_of(class_label: Optional[str]) -> Optional[str]:
+    """``'_G1'``/``'_G2'`` for a group label, None for the whole class."""
+    if class_label:
+        for suffix in GROUP_SUFFIXES:
+            if suffix in class_label:
+                return suffix
+    return None
+
+
+def _activity_key(table: ActivityTable, row: int):
+    code = table.activity_id[row]
+    if code:
+        # FET numbers activities per export, so an Id is only unique within its file
+        return (table.source_file[row], code)
+    # exports without Activity Id: one activity per (file, subject, students)
+    return (table.source_file[row], table.subject[row], table.class_[row])
+
+
+def slot_conflicts(kind: str, entity: str, slots: Dict[int, List[int]], table: ActivityTable) -> List[Conflict]:
+    """Conflicts in one entity's slot index (``slot -> rows``), in week order;
+    linear in its rows."""
+    strings = table.pool.strings
+    found: List[Conflict] = []
+    for slot in sorted(slots):
+        rows = slots[slot]
+        if len(rows) < 2:
+            continue
+        activities: Dict[object, int] = {}
+        for row in rows:
+            activities.setdefault(_activity_key(table, row), row)
+        if len(activities) < 2:
+            continue
+        if kind == 'class':
+            groups = [group_of(strings[table.class_[row]]) for row in activities.values()]
+            if None not in groups and len(set(groups)) == len(groups):
+                continue
+        weekday, hour = divmod(slot, HOURS_PER_DAY)
+        found.append(Conflict(kind, entity, weekday, hour, tuple(activities.values())))
+    return found
@@ -2,32 +2,142 @@
 Keep Arabic UI labels and comments intact.
 """
 from __future__ import annotations
-import csv
+import copy
+import hashlib
 import os
 import re
 import logging
-from typing import Dict, List, Optional, Set, Any
+from array import array
+from bisect import bisect_right
+from sys import intern
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from core.activity_store import (NONE_INT, Activity, ActivityRecord, ActivityTable, ActivityView,
+                                 ClassActivityRecord)
+from core.fet_csv import read_fet_rows
+from core.import_report import FileReport, ImportReport, RejectedRow
+from core.conflicts import Conflict, slot_conflicts
+from core.day_shape import ScheduleShape, compute_schedule_shapes
+from core.query_cache import QueryCache, cached_query
+from core.search_index import SearchIndex
+from core.workload import Workload, compute_workload
+from core.occupancy import HOURS_PER_DAY, mask_of, slot_bit, slots_of
+from core.teacher_names import TeacherNameCanonicalizer
+from core.timetable_diff import SessionChange, diff_entity
+from core.snapshot import read_snapshot, write_snapshot
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_COLORS = ["#FFCCCB", "#B2FF66", "#FFD580", "#AED6F1", "#D7BDE2", "#ABEBC6",
                   "#F9E79F", "#F5CBA7", "#A9DFBF", "#F5B7B1", "#85C1E9", "#D6EAF8", "#FADBD8"]
 
+WEEKDAY_NAMES = {
+    'الاثنين': 0, 'اثنين': 0, 'الإثنين': 0,
+    'الثلاثاء': 1,
+    'الاربعاء': 2, 'الأربعاء': 2,
+    'الخميس': 3, 'الجمعة': 4, 'السبت': 5,
+    'الاحد': 6, 'الأحد': 6,
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6,
+    'lundi': 0, 'mardi': 1, 'mercredi': 2, 'jeudi': 3, 'vendredi': 4, 'samedi': 5, 'dimanche': 6
+}
+
+REAL_CLASSES = frozenset(f"{g}M{i}" for g in (1, 2, 3, 4) for i in range(1, 6))
+
+# timetable grid layout, as in the original single-file program
+GRID_MORNING_HOURS = (8, 9, 10, 11)
+GRID_AFTERNOON_HOURS = (14, 15, 16, 17)
+GRID_DAYS_ORDER = (6, 0, 1, 2, 3)
+DAYS_AR = {6: "الأحد", 0: "الاثنين", 1: "الثلاثاء", 2: "الأربعاء", 3: "الخميس", 4: "الجمعة", 5: "السبت"}
+
+# the school week the free-slot queries search by default
+SCHOOL_WEEK_MASK = mask_of(GRID_DAYS_ORDER, GRID_MORNING_HOURS + GRID_AFTERNOON_HOURS)
+
+ONE_DAY = timedelta(days=1)
+
+# below this much CSV data a process pool costs more than it saves
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+# the timetable version imports go to until another one is selected
+DEFAULT_VERSION = 'default'
+
+
+def file_fingerprint(path: str, previous: Optional[tuple] = None) -> tuple:
+    """Return ``(size, mtime_ns, sha256)`` for a file.
+    The content is only hashed when size or mtime differ from ``previous``.
+    """
+    st = os.stat(path)
+    if previous and previous[:2] == (st.st_size, st.st_mtime_ns):
+        return previous
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return (st.st_size, st.st_mtime_ns, h.hexdigest())
+
 
 class DataManager:
     """Manage import, in-memory data structures and simple queries.
     This replaces global dictionaries from the original single-file program.
     """
 
-    def __init__(self):
+    def __init__(self, snapshot_path: Optional[str] = None, aliases_path: Optional[str] = None):
+        # the single activity table (and string pool) the views of every
+        # timetable version refer into by row id; rows of removed/replaced
+        # files stay as dead rows until compaction
+        self.activities = ActivityTable()
+        self._dead_rows = 0
+        # name of the timetable version the attributes below belong to; the
+        # others are parked in _versions (see switch_version)
+        self.version = DEFAULT_VERSION
+        self._versions: Dict[str, Dict[str, Any]] = {}
+        self._stale_versions: Set[str] = set()
+        self._init_timetable_state()
+        # written after every import, read back by load_snapshot()
+        self.snapshot_path = snapshot_path
+        # raw teacher spellings -> canonical teacher IDs, persisted as JSON
+        self.aliases_path = aliases_path
+        self.teacher_names = TeacherNameCanonicalizer.load(aliases_path)
+        # derived read results; every change to the data bumps its generation
+        self.query_cache = QueryCache()
+
+    def _init_timetable_state(self) -> None:
+        """Empty structures of one timetable version (``_VERSION_FIELDS``)."""
         # key structures
         self.materials_teachers: Dict[str, List[str]] = {}
         self.materials_colors: Dict[str, str] = {}
         self.teachers_subjects: Dict[str, List[str]] = {}
         self.teachers_classes: Dict[str, List[str]] = {}
         self.classes_teachers: Dict[str, List[str]] = {}
-        self.classes_timetable: Dict[str, List[Dict[str, Any]]] = {}
-        self.timetable_data: Dict[str, List[Dict[str, Any]]] = {}
+        self.classes_timetable: Dict[str, ActivityView] = {}
+        self.timetable_data: Dict[str, ActivityView] = {}
+        self.rooms_timetable: Dict[str, ActivityView] = {}
+        # teacher/class/room -> slot (weekday * HOURS_PER_DAY + hour) -> table rows,
+        # one entry per hour a session covers
+        self.teacher_slots: Dict[str, Dict[int, List[int]]] = {}
+        self.class_slots: Dict[str, Dict[int, List[int]]] = {}
+        self.room_slots: Dict[str, Dict[int, List[int]]] = {}
+        # the same as weekly occupancy bitmaps, bit n = slot n (see core.occupancy)
+        self.teacher_busy: Dict[str, int] = {}
+        self.class_busy: Dict[str, int] = {}
+        self.room_busy: Dict[str, int] = {}
+        # type-ahead search over teacher, subject, class and room names
+        self.search_index = SearchIndex()
+        # teacher -> 7 weekdays -> ((hour, row), ...) expected sessions, see sessions_for_prof_on_date
+        self.teacher_days: Dict[str, Tuple[Tuple[Tuple[int, int], ...], ...]] = {}
+        # kind ('teacher'/'class'/'room') -> entity -> its double-booked slots
+        self.conflicts: Dict[str, Dict[str, List[Conflict]]] = {'teacher': {}, 'class': {}, 'room': {}}
+        # kind -> slot -> entities busy in it (the inverse of the *_slots indexes)
+        self.slot_occupants: Dict[str, Dict[int, Set[str]]] = {'teacher': {}, 'class': {}, 'room': {}}
+        # incremental import state: abs path -> (size, mtime_ns, sha256) / parsed result
+        self.source_fingerprints: Dict[str, tuple] = {}
+        self._parsed_files: Dict[str, ParsedFile] = {}
+        self._source_order: List[str] = []
+        # timings, cache hit rates and rejected rows of the latest import
+        self.last_import_report: Optional[ImportReport] = None
 
     # ----------------- normalization helpers -----------------
     @staticmethod
@@ -74,17 +184,9 @@ class DataManager:
                 return v - 1
             if 0 <= v <= 6:
                 return v
-        mapping = {
-            'الاثنين': 0, 'اثنين': 0, 'الإثنين': 0,
-            'الثلاثاء': 1, 'الثلاثاء': 1,
-            'الاربعاء': 2, 'الأربعاء': 2,
-            'الخميس': 3, 'الجمعة': 4, 'السبت': 5,
-            'الاحد': 6,
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6
-        }
-        if s in mapping:
-            return mapping[s]
-        for k, v in mapping.items():
+        if s in WEEKDAY_NAMES:
+            return WEEKDAY_NAMES[s]
+        for k, v in WEEKDAY_NAMES.items():
             if k in s:
                 return v
         return None
@@ -123,9 +225,8 @@ class DataManager:
         if not class_name:
             return False
         class_str = str(class_name).strip()
-        real_classes = {f"{g}M{i}" for g in (1, 2, 3, 4) for i in range(1, 6)}
         # quick membership
-        if class_str in real_classes:
+        if class_str in REAL_CLASSES:
             return True
         if class_str.endswith('_G1') or class_str.endswith('_G2'):
             return False
@@ -152,138 +253,1094 @@ class DataManager:
             self.materials_colors[subject] = DEFAULT_COLORS[len(self.materials_colors) % len(DEFAULT_COLORS)]
         return self.materials_colors[subject]
 
+    def add_teacher_alias(self, spelling: str, canonical: str) -> None:
+        """Record that ``spelling`` is the teacher ``canonical`` and re-apply the
+        alias table to the loaded files."""
+        self.teacher_names.add_alias(spelling, canonical)
+        if self._source_order:
+            self.import_fet_activities_csv_files(list(self._source_order), force=True)
+        elif self.aliases_path:
+            self.teacher_names.save(self.aliases_path)
+
     # ----------------- CSV import -----------------
-    def import_fet_activities_csv_files(self, paths: List[str]) -> bool:
+    def iter_activities(self, paths: Iterable[str]) -> Iterator[Activity]:
+        """Stream normalized activities from one or more FET CSVs, one
+        ``Activity`` per (row, teacher), without building any structure.
+        Teachers are canonical IDs; rows whose Day/Hour could not be decoded are
+        yielded with ``weekday``/``start_hour`` None. Memory stays constant
+        however many files are read. Teachers not imported yet are named in
+        a copy of the alias table, so streaming leaves it untouched.
+        """
+        names = self.teacher_names.copy()
+        for path in paths:
+            if not path or not os.path.exists(path):
+                logger.warning("ملف غير موجود: %s", path)
+                continue
+            yield from iter_fet_activities(path, names)
+
+    def import_fet_activities_csv_files(self, paths: List[str], workers: Optional[int] = None,
+                                        force: bool = False) -> bool:
         """Import multiple CSVs and populate all structures.
+        Files whose fingerprint (size, mtime, content hash) is unchanged since the
+        last import are kept as they are; only new or changed files are parsed
+        (in a process pool when worthwhile) and only the teachers, classes and
+        subjects they touch are rebuilt. ``force=True`` reparses everything.
         Returns True on success; logs issues but keeps best-effort parsing.
+        Details (timings, rejected rows) are left in ``last_import_report``.
         """
-        # clear
-        self.timetable_data.clear()
-        self.materials_teachers.clear()
-        self.materials_colors.clear()
-        self.teachers_subjects.clear()
-        self.teachers_classes.clear()
-        self.classes_teachers.clear()
-        self.classes_timetable.clear()
-
-        total = 0
-        problematic_rows = []
-
+        started = perf_counter()
+        report = ImportReport()
+        order: List[str] = []
+        fingerprints: Dict[str, tuple] = {}
         for path in paths:
             if not path or not os.path.exists(path):
                 logger.warning("ملف غير موجود: %s", path)
                 continue
-            with open(path, encoding='utf-8-sig') as f:
-                # detect delimiter by checking header line
-                header = f.readline()
-                f.seek(0)
-                delimiter = ','
-                if '\t' in header:
-                    delimiter = '\t'
-                elif ';' in header and header.count(';') > header.count(','):
-                    delimiter = ';'
-                reader = csv.DictReader(f, delimiter=delimiter)
-
-                for row_num, row in enumerate(reader, start=1):
-                    act_id = (row.get('Activity Id') or row.get('ActivityId') or row.get('ID') or '')
-                    day_raw = row.get('Day') or row.get('day') or row.get('اليوم') or ''
-                    hour_raw = row.get('Hour') or row.get('Period') or row.get('الساعة') or ''
-                    subject = (row.get('Subject') or row.get('subject') or row.get('المادة') or '').strip()
-                    teachers_raw = (row.get('Teachers') or row.get('Teacher') or row.get('الأستاذ') or '').strip()
-                    students_set = (row.get('Students Sets') or row.get('Students') or row.get('Classe') or row.get('الصف') or '').strip()
-                    room = (row.get('Room') or row.get('Classroom') or row.get('القاعة') or '').strip()
-
-                    if not any([day_raw, hour_raw, teachers_raw]):
-                        continue
-                    teacher_names = self.split_teachers_field(teachers_raw)
-                    if not teacher_names:
-                        continue
-                    day_str = str(day_raw)
-                    period = None
-                    if ' ص' in day_str:
-                        period = 'morning'
-                    elif ' م' in day_str:
-                        period = 'afternoon'
-                    day_clean = re.sub(r'\s*[مص]\s*$', '', day_str).strip()
-                    wd = self.extract_weekday(day_clean)
-                    start_hour = self.hour_from_field_enhanced(hour_raw, period)
-                    duration = 1
-                    if 'Duration' in row and row.get('Duration'):
-                        try:
-                            duration = int(row.get('Duration'))
-                        except Exception:
-                            duration = 1
-                    if wd is None or start_hour is None:
-                        problematic_rows.append((path, row_num, day_raw, hour_raw))
-
-                    for teacher in teacher_names:
-                        if subject:
-                            self.materials_teachers.setdefault(subject, set()).add(teacher)
-                            self.teachers_subjects.setdefault(teacher, set()).add(subject)
-                        if students_set:
-                            main_class = self.extract_main_class(students_set)
-                            if self.is_real_class(main_class):
-                                self.teachers_classes.setdefault(teacher, set()).add(main_class)
-                                self.classes_teachers.setdefault(main_class, set()).add(teacher)
-                        activity = {
-                            'weekday': wd,
-                            'start_hour': start_hour,
-                            'duration': duration,
-                            'subject': subject,
-                            'room': room,
-                            'class': students_set,
-                            'activity_id': act_id or None,
-                            'source_file': os.path.basename(path),
-                            'original_hour_field': hour_raw,
-                            'original_day_field': day_raw,
-                            'period': period
-                        }
-                        self.timetable_data.setdefault(teacher, []).append(activity)
-                        if students_set:
-                            main_class = self.extract_main_class(students_set)
-                            if self.is_real_class(main_class):
-                                class_activity = activity.copy()
-                                class_activity['teacher'] = teacher
-                                class_activity['original_class'] = students_set
-                                self.classes_timetable.setdefault(main_class, []).append(class_activity)
-                        total += 1
-
-        # finalize: convert sets to sorted lists
-        for subject in list(self.materials_teachers.keys()):
-            self.materials_teachers[subject] = sorted(list(self.materials_teachers[subject]))
-        for teacher in list(self.teachers_subjects.keys()):
-            self.teachers_subjects[teacher] = sorted(list(self.teachers_subjects[teacher]))
-        for teacher in list(self.teachers_classes.keys()):
-            self.teachers_classes[teacher] = sorted(list(self.teachers_classes[teacher]))
-        for class_name in list(self.classes_teachers.keys()):
-            self.classes_teachers[class_name] = sorted(list(self.classes_teachers[class_name]))
+            key = os.path.abspath(path)
+            if key in fingerprints:
+                continue
+            order.append(key)
+            fingerprints[key] = file_fingerprint(key, self.source_fingerprints.get(key))
+
+        changed = [key for key in order
+                   if force or key not in self._parsed_files
+                   or self.source_fingerprints.get(key, ())[2:] != fingerprints[key][2:]]
+        removed = [key for key in self._parsed_files if key not in fingerprints]
+        report.removed = removed
+
+        # dicts as ordered sets: new keys are inserted in first-seen order
+        dirty_teachers: Dict[str, None] = {}
+        dirty_classes: Dict[str, None] = {}
+        dirty_rooms: Dict[str, None] = {}
+        dirty_subjects: Dict[str, None] = {}
+
+        # kind -> teacher/class/room -> row arrays it lost / gained, so only the
+        # slots those rows cover are re-indexed (see _update_slots)
+        removed_rows: Dict[str, Dict[str, List[array]]] = {'teacher': {}, 'class': {}, 'room': {}}
+        added_rows: Dict[str, Dict[str, List[array]]] = {'teacher': {}, 'class': {}, 'room': {}}
+
+        def mark_dirty(parsed: ParsedFile, moved: Optional[Dict[str, Dict[str, List[array]]]] = None) -> None:
+            for keys in (parsed.teacher_rows, parsed.teachers_subjects, parsed.teachers_classes):
+                dirty_teachers.update(dict.fromkeys(keys))
+            for keys in (parsed.class_rows, parsed.classes_teachers):
+                dirty_classes.update(dict.fromkeys(keys))
+            dirty_rooms.update(dict.fromkeys(parsed.room_rows))
+            dirty_subjects.update(dict.fromkeys(parsed.materials_teachers))
+            if moved is not None:
+                for kind, rows_by_key in (('teacher', parsed.teacher_rows), ('class', parsed.class_rows),
+                                          ('room', parsed.room_rows)):
+                    target = moved[kind]
+                    for key, rows in rows_by_key.items():
+                        target.setdefault(key, []).append(rows)
+
+        for key in removed:
+            old = self._parsed_files.pop(key)
+            self._release(old)
+            mark_dirty(old, removed_rows)
+        # a file another version already holds with the same content shares its rows
+        shared = {} if force else {key: self._shared_parse(key, fingerprints[key]) for key in changed}
+        for key, parsed in shared.items():
+            if parsed is not None:
+                old = self._parsed_files.get(key)
+                if old is not None:
+                    self._release(old)
+                    mark_dirty(old, removed_rows)
+                self._parsed_files[key] = parsed
+                mark_dirty(parsed, added_rows)
+        to_parse = [key for key in changed if shared.get(key) is None]
+        for key, parsed in zip(to_parse, self._parse_files(to_parse, workers)):
+            t0 = perf_counter()
+            old = self._parsed_files.get(key)
+            if old is not None:
+                self._release(old)
+                mark_dirty(old, removed_rows)
+            # canonical IDs are assigned here, in path order, so they do not
+            # depend on which worker parsed which file
+            resolve = self.teacher_names.resolve
+            parsed.rename_teachers({k: resolve(k, sp) for k, sp in parsed.teacher_spellings.items()})
+            self._attach_rows(parsed)
+            mark_dirty(parsed, added_rows)
+            self._parsed_files[key] = parsed
+            parsed.report.seconds['finalize'] = perf_counter() - t0
+
+        # per-teacher/class lists follow file order; a reordering invalidates all of them
+        moved: Optional[tuple] = (removed_rows, added_rows)
+        kept = [key for key in self._source_order if key in fingerprints]
+        if kept != [key for key in order if key in kept]:
+            moved = None
+            for key in order:
+                mark_dirty(self._parsed_files[key])
+
+        t0 = perf_counter()
+        self._source_order = order
+        self.source_fingerprints = fingerprints
+        if self._dead_rows > len(self.activities) // 2:
+            # renumbers every row
+            moved = None
+            self._compact_activities()
+            for key in order:
+                mark_dirty(self._parsed_files[key])
+        self._rebuild_entries(dirty_teachers, dirty_classes, dirty_subjects, dirty_rooms, moved)
+
+        reparsed = set(to_parse)
+        for key in order:
+            file_report = self._parsed_files[key].report
+            file_report.reparsed = key in reparsed
+            report.files.append(file_report)
+        if self.aliases_path and self.teacher_names.dirty:
+            self.teacher_names.save(self.aliases_path)
+        self.last_import_report = report
+        self.query_cache.bump()
+        if self.snapshot_path:
+            self.save_snapshot()
+        report.conflicts = sum(len(found) for by_entity in self.conflicts.values() for found in by_entity.values())
+        report.finalize_seconds = perf_counter() - t0
+        report.wall_seconds = perf_counter() - started
+        logger.info("Imported %d activities from %d files (%d reparsed, %d removed, %d rejected rows, "
+                    "%d conflicts) in %.0f ms, %.0f rows/s",
+                    report.activities, len(order), len(to_parse), len(removed), len(report.rejected),
+                    report.conflicts, report.wall_seconds * 1000, report.rows_per_sec)
+        return True
+
+    @staticmethod
+    def _parse_files(paths: List[str], workers: Optional[int] = None) -> List[ParsedFile]:
+        """Parse every file, in a process pool when there is enough work for it.
+        ``workers=None`` picks automatically; ``workers=1`` forces a single thread.
+        """
+        if not paths:
+            return []
+        if workers is None:
+            total_bytes = sum(os.path.getsize(p) for p in paths)
+            workers = min(len(paths), os.cpu_count() or 1) if total_bytes >= PARALLEL_MIN_BYTES else 1
+        workers = min(workers, len(paths))
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # map() keeps results in ``paths`` order
+                    return list(pool.map(parse_fet_csv_file, paths))
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning("تعذر التحليل المتوازي، المتابعة بشكل تسلسلي: %s", e)
+        return [parse_fet_csv_file(p) for p in paths]
+
+    def _attach_rows(self, parsed: ParsedFile) -> None:
+        """Move a freshly parsed file's rows into the shared activity table and
+        turn its per-teacher/per-class row numbers into table ids."""
+        parsed.base = base = self.activities.extend(parsed.table)
+        parsed.table = None
+        if base:
+            for rows_by_key in (parsed.teacher_rows, parsed.class_rows, parsed.room_rows):
+                for key, rows in rows_by_key.items():
+                    rows_by_key[key] = array('I', [base + r for r in rows])
+
+    def _live_files(self) -> List[ParsedFile]:
+        """Parsed files held by any timetable version, each once, the current version's first."""
+        live: Dict[int, ParsedFile] = {}
+        for parsed_files in [self._parsed_files] + [v['_parsed_files'] for v in self._versions.values()]:
+            for parsed in parsed_files.values():
+                live.setdefault(id(parsed), parsed)
+        return list(live.values())
+
+    def _shared_parse(self, key: str, fingerprint: tuple) -> Optional[ParsedFile]:
+        """Another version's parse of ``key`` if it had the same content hash."""
+        for state in self._versions.values():
+            parsed = state['_parsed_files'].get(key)
+            if (parsed is not None and not parsed.edited
+                    and state['source_fingerprints'][key][2:] == fingerprint[2:]):
+                return parsed
+        return None
+
+    def _release(self, parsed: ParsedFile) -> None:
+        """Count a file dropped from the current version as dead rows unless
+        another version still holds it."""
+        if all(parsed is not p for v in self._versions.values() for p in v['_parsed_files'].values()):
+            self._dead_rows += parsed.total
+
+    def _compact_activities(self) -> None:
+        """Drop dead rows by copying live files' rows into a new table (renumbers
+        ids, so the other versions' indexes are rebuilt when next selected)."""
+        table = ActivityTable()
+        for parsed in self._live_files():
+            base = table.extend(self.activities, parsed.base, parsed.base + parsed.total)
+            delta, parsed.base = base - parsed.base, base
+            if delta:
+                for rows_by_key in (parsed.teacher_rows, parsed.class_rows, parsed.room_rows):
+                    for k, rows in rows_by_key.items():
+                        rows_by_key[k] = array('I', [r + delta for r in rows])
+        self.activities = table
+        self._dead_rows = 0
+        self._stale_versions.update(self._versions)
+
+    def _rebuild_entries(self, teachers: Iterable[str], classes: Iterable[str], subjects: Iterable[str],
+                         rooms: Iterable[str] = (), moved: Optional[tuple] = None) -> None:
+        """Recompute the given keys of every structure from the per-file results,
+        in source order, leaving all other entries untouched. With ``moved``,
+        the ``(removed, added)`` rows per kind and key since the indexes were
+        last built, the slot indexes are patched rather than rebuilt."""
+        parsed_files = [self._parsed_files[key] for key in self._source_order]
+
+        def rebuild_views(target: Dict[str, ActivityView], attr: str, keys: Iterable[str],
+                          record_type: type) -> None:
+            for key in keys:
+                ids = array('I')
+                for p in parsed_files:
+                    rows = getattr(p, attr).get(key)
+                    if rows:
+                        ids.extend(rows)
+                if ids:
+                    target[key] = ActivityView(self.activities, ids, record_type)
+                else:
+                    target.pop(key, None)
+
+        def rebuild_sets(target: Dict[str, List[str]], attr: str, keys: Iterable[str]) -> None:
+            for key in keys:
+                merged: Set[str] = set()
+                for p in parsed_files:
+                    merged.update(getattr(p, attr).get(key, ()))
+                if merged:
+                    target[key] = sorted(merged)
+                else:
+                    target.pop(key, None)
+
+        rebuild_views(self.timetable_data, 'teacher_rows', teachers, ActivityRecord)
+        rebuild_views(self.classes_timetable, 'class_rows', classes, ClassActivityRecord)
+        rebuild_views(self.rooms_timetable, 'room_rows', rooms, ClassActivityRecord)
+        if moved is None:
+            self._index_slots('teacher', teachers)
+            self._index_teacher_days(teachers)
+            self._index_slots('class', classes)
+            self._index_slots('room', rooms)
+        else:
+            removed, added = moved
+            self._update_slots('teacher', teachers, removed['teacher'], added['teacher'])
+            self._update_teacher_days(teachers, removed['teacher'], added['teacher'])
+            self._update_slots('class', classes, removed['class'], added['class'])
+            self._update_slots('room', rooms, removed['room'], added['room'])
+        rebuild_sets(self.materials_teachers, 'materials_teachers', subjects)
+        rebuild_sets(self.teachers_subjects, 'teachers_subjects', teachers)
+        rebuild_sets(self.teachers_classes, 'teachers_classes', teachers)
+        rebuild_sets(self.classes_teachers, 'classes_teachers', classes)
+        self.search_index.sync('teacher', teachers, self.timetable_data)
+        self.search_index.sync('subject', subjects, self.materials_teachers)
+        self.search_index.sync('class', classes, self.classes_timetable)
+        self.search_index.sync('room', rooms, self.rooms_timetable)
 
         # assign colors deterministically
-        mats = sorted(list(self.materials_teachers.keys()))
-        for i, m in enumerate(mats):
-            self.materials_colors[m] = DEFAULT_COLORS[i % len(DEFAULT_COLORS)]
+        if subjects or set(self.materials_colors) != set(self.materials_teachers):
+            self.materials_colors.clear()
+            mats = sorted(list(self.materials_teachers.keys()))
+            for i, m in enumerate(mats):
+                self.materials_colors[m] = DEFAULT_COLORS[i % len(DEFAULT_COLORS)]
+
+    def _index_teacher_days(self, teachers: Iterable[str]) -> None:
+        """Per weekday, the ``(hour, row)`` sessions of each teacher between
+        8h and 20h, sorted by hour; a row without a weekday counts on every day,
+        and for an hour taken twice the later row wins."""
+        table = self.activities
+        weekday, start_hour, duration = table.weekday, table.start_hour, table.duration
+        for teacher in teachers:
+            view = self.timetable_data.get(teacher)
+            if view is None:
+                self.teacher_days.pop(teacher, None)
+                continue
+            days: List[Dict[int, int]] = [{} for _ in range(7)]
+            for row in view.ids:
+                start = start_hour[row]
+                if start == NONE_INT:
+                    continue
+                wd = weekday[row]
+                hours = [h for h in range(start, start + max(1, duration[row])) if 8 <= h <= 20]
+                for d in (days if wd == NONE_INT else (days[wd],)):
+                    for h in hours:
+                        d[h] = row
+            self.teacher_days[teacher] = tuple(tuple(sorted(d.items())) for d in days)
+
+    def _index_slots(self, kind: str, keys: Iterable[str]) -> None:
+        """(Re)build the slot index, occupancy bitmap and conflicts of the given
+        teachers, classes or rooms from their views. Slots are keyed by their
+        bit number ``weekday * HOURS_PER_DAY + hour``."""
+        target, busy, _record_type = self._slot_index(kind)
+        views = {'teacher': self.timetable_data, 'class': self.classes_timetable, 'room': self.rooms_timetable}[kind]
+        conflicts = self.conflicts[kind]
+        occupants = self.slot_occupants[kind]
+        table = self.activities
+        weekday, start_hour, duration = table.weekday, table.start_hour, table.duration
+        for key in keys:
+            for slot in target.get(key, ()):
+                occupants[slot].discard(key)
+            view = views.get(key)
+            if view is None:
+                target.pop(key, None)
+                busy.pop(key, None)
+                conflicts.pop(key, None)
+                continue
+            ids = view.ids
+            slots: Dict[int, List[int]] = {}
+            for row, wd, start, dur in zip(ids, map(weekday.__getitem__, ids), map(start_hour.__getitem__, ids),
+                                           map(duration.__getitem__, ids)):
+                if wd == NONE_INT or start == NONE_INT:
+                    continue
+                slot = wd * HOURS_PER_DAY + start
+                # a session running past midnight is cut at the end of its day
+                end = slot + min(dur, HOURS_PER_DAY - start)
+                for slot in range(slot, end) if dur > 1 else (slot,):
+                    rows = slots.get(slot)
+                    if rows is None:
+                        slots[slot] = [row]
+                    else:
+                        rows.append(row)
+            target[key] = slots
+            bits = 0
+            for slot in slots:
+                bits |= 1 << slot
+                occupants.setdefault(slot, set()).add(key)
+            busy[key] = bits
+            found = slot_conflicts(kind, key, slots, table)
+            if found:
+                conflicts[key] = found
+            else:
+                conflicts.pop(key, None)
+
+    def _row_slots(self, row: int) -> Sequence[int]:
+        """Slots a row covers, as indexed by _index_slots()."""
+        table = self.activities
+        wd, start, dur = table.weekday[row], table.start_hour[row], table.duration[row]
+        if wd == NONE_INT or start == NONE_INT:
+            return ()
+        slot = wd * HOURS_PER_DAY + start
+        return range(slot, slot + min(dur, HOURS_PER_DAY - start)) if dur > 1 else (slot,)
+
+    def _row_order(self):
+        """Sort key of table rows in timetable order: source file, then row."""
+        files = [(p.base, rank) for rank, p in enumerate(self._parsed_files[key] for key in self._source_order)
+                 if p.total]
+        files.sort()
+        bases = [base for base, _rank in files]
+        ranks = [rank for _base, rank in files]
+        return lambda row: (ranks[bisect_right(bases, row) - 1], row)
 
-        logger.info("Imported %d activities from %d files (%d problematic rows)", total, len(paths), len(problematic_rows))
+    def _update_slots(self, kind: str, keys: Iterable[str], removed: Dict[str, List[array]],
+                      added: Dict[str, List[array]]) -> None:
+        """_index_slots() for keys already indexed, done by taking the
+        ``removed`` rows out and putting the ``added`` ones in: only the slots
+        they cover get their rows, bit, occupants and conflicts recomputed."""
+        target, busy, _record_type = self._slot_index(kind)
+        views = {'teacher': self.timetable_data, 'class': self.classes_timetable, 'room': self.rooms_timetable}[kind]
+        conflicts = self.conflicts[kind]
+        occupants = self.slot_occupants[kind]
+        order = None
+        for key in keys:
+            slots = target.get(key)
+            if slots is None or key not in views:
+                self._index_slots(kind, [key])
+                continue
+            touched: Set[int] = set()
+            for rows in removed.get(key, ()):
+                for row in rows:
+                    for slot in self._row_slots(row):
+                        slots[slot].remove(row)
+                        touched.add(slot)
+            for rows in added.get(key, ()):
+                for row in rows:
+                    for slot in self._row_slots(row):
+                        found = slots.get(slot)
+                        if not found:
+                            slots[slot] = [row]
+                        else:
+                            # keep the slot's rows in timetable order
+                            order = order or self._row_order()
+                            if order(found[-1]) < order(row):
+                                found.append(row)
+                            else:
+                                found.insert(bisect_right([order(r) for r in found], order(row)), row)
+                        touched.add(slot)
+            if not touched:
+                continue
+            bits = busy.get(key, 0)
+            for slot in touched:
+                if slots[slot]:
+                    bits |= 1 << slot
+                    occupants.setdefault(slot, set()).add(key)
+                else:
+                    del slots[slot]
+                    bits &= ~(1 << slot)
+                    occupants[slot].discard(key)
+            busy[key] = bits
+            found = [c for c in conflicts.get(key, ()) if c.weekday * HOURS_PER_DAY + c.hour not in touched]
+            found += slot_conflicts(kind, key, {slot: slots[slot] for slot in touched if slot in slots},
+                                    self.activities)
+            if found:
+                conflicts[key] = sorted(found, key=lambda c: (c.weekday, c.hour))
+            else:
+                conflicts.pop(key, None)
+
+    def _update_teacher_days(self, teachers: Iterable[str], removed: Dict[str, List[array]],
+                             added: Dict[str, List[array]]) -> None:
+        """_index_teacher_days() for teachers already indexed, redoing only the
+        weekdays of their removed and added rows, from the slot index."""
+        weekday = self.activities.weekday
+        for teacher in teachers:
+            days = self.teacher_days.get(teacher)
+            view = self.timetable_data.get(teacher)
+            moved = removed.get(teacher, []) + added.get(teacher, [])
+            if not moved:
+                continue
+            # a row without a weekday counts on every day
+            if days is None or view is None or NONE_INT in map(weekday.__getitem__, view.ids):
+                self._index_teacher_days([teacher])
+                continue
+            touched = {weekday[row] for rows in moved for row in rows}
+            if NONE_INT in touched:
+                self._index_teacher_days([teacher])
+                continue
+            slots = self.teacher_slots[teacher]
+            days = list(days)
+            for wd in touched:
+                base = wd * HOURS_PER_DAY
+                # the last row of a slot is the later one in timetable order
+                days[wd] = tuple((h, slots[base + h][-1]) for h in range(8, 21) if base + h in slots)
+            self.teacher_days[teacher] = tuple(days)
+
+    # ----------------- snapshot -----------------
+    _SNAPSHOT_FIELDS = ('materials_teachers', 'materials_colors', 'teachers_subjects', 'teachers_classes',
+                        'classes_teachers', 'classes_timetable', 'timetable_data', 'rooms_timetable',
+                        'teacher_slots', 'class_slots', 'room_slots', 'teacher_busy', 'class_busy',
+                        'room_busy', 'conflicts', 'slot_occupants', 'teacher_days', 'search_index', 'activities',
+                        '_dead_rows')
+
+    def save_snapshot(self, path: Optional[str] = None) -> bool:
+        """Write the parsed state of the current timetable version (and the
+        per-file results needed for later incremental imports) to a binary snapshot."""
+        path = path or self.snapshot_path
+        state = {name: getattr(self, name) for name in self._SNAPSHOT_FIELDS}
+        state['sources'] = [(key, self.source_fingerprints[key]) for key in self._source_order]
+        state['parsed_files'] = [self._parsed_files[key] for key in self._source_order]
+        try:
+            write_snapshot(path, state)
+            return True
+        except OSError as e:
+            logger.warning("تعذر حفظ اللقطة %s: %s", path, e)
+            return False
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """Restore the state saved by save_snapshot() if every source CSV still
+        has the recorded content hash. Returns False (state untouched) otherwise."""
+        path = path or self.snapshot_path
+        state = read_snapshot(path) if path else None
+        if state is None:
+            return False
+        fingerprints: Dict[str, tuple] = {}
+        for key, fp in state['sources']:
+            if not os.path.exists(key):
+                return False
+            current = file_fingerprint(key, fp)
+            if current[2] != fp[2]:
+                logger.info("المصدر %s تغير منذ اللقطة", key)
+                return False
+            fingerprints[key] = current
+        for name in self._SNAPSHOT_FIELDS:
+            setattr(self, name, state[name])
+        self._source_order = [key for key, _fp in state['sources']]
+        self._parsed_files = dict(zip(self._source_order, state['parsed_files']))
+        self.source_fingerprints = fingerprints
+        # other versions' rows lived in the replaced table
+        self._versions.clear()
+        self._stale_versions.clear()
+        self.query_cache.bump()
+        logger.info("Loaded snapshot %s (%d teachers)", path, len(self.timetable_data))
         return True
 
+    # ----------------- timetable versions -----------------
+    # per-version attributes; everything else (the activity table and its string
+    # pool, teacher names, the query cache) is shared by all versions
+    _VERSION_FIELDS = ('materials_teachers', 'materials_colors', 'teachers_subjects', 'teachers_classes',
+                       'classes_teachers', 'classes_timetable', 'timetable_data', 'rooms_timetable',
+                       'teacher_slots', 'class_slots', 'room_slots', 'teacher_busy', 'class_busy',
+                       'room_busy', 'conflicts', 'slot_occupants', 'teacher_days', 'search_index',
+                       'source_fingerprints', '_parsed_files', '_source_order', 'last_import_report')
+
+    @property
+    def versions(self) -> List[str]:
+        """Names of the timetable versions held, the current one included."""
+        return sorted(set(self._versions) | {self.version})
+
+    def switch_version(self, name: str) -> None:
+        """Make ``name`` the current timetable version; every query and import
+        then works on it. A new name starts empty. The version left is kept as it is."""
+        if name == self.version:
+            return
+        self._versions[self.version] = {field: getattr(self, field) for field in self._VERSION_FIELDS}
+        state = self._versions.pop(name, None)
+        self.version = name
+        if state is None:
+            self._init_timetable_state()
+        else:
+            for field, value in state.items():
+                setattr(self, field, value)
+            if name in self._stale_versions:
+                # row ids moved under it (compaction, edits of shared rows)
+                self._stale_versions.discard(name)
+                self._reindex_all()
+        self.query_cache.bump()
+
+    def load_version(self, name: str, paths: List[str], workers: Optional[int] = None) -> bool:
+        """Import ``paths`` as the timetable version ``name`` and make it current.
+        Files with the same content as in another version share its rows."""
+        self.switch_version(name)
+        return self.import_fet_activities_csv_files(paths, workers)
+
+    def drop_version(self, name: str) -> None:
+        """Forget a version other than the current one."""
+        if name == self.version:
+            raise ValueError(f"cannot drop the current timetable version: {name!r}")
+        state = self._versions.pop(name)
+        self._stale_versions.discard(name)
+        for parsed in state['_parsed_files'].values():
+            if all(parsed is not p for p in self._parsed_files.values()):
+                self._release(parsed)
+
+    def _reindex_all(self) -> None:
+        self._rebuild_entries(*self._keys_of(self._parsed_files.values()))
+
+    @staticmethod
+    def _keys_of(parsed_files: Iterable[ParsedFile]) -> Tuple[Dict[str, None], ...]:
+        """(teachers, classes, subjects, rooms) the given files hold, as ordered sets."""
+        keys: Tuple[Dict[str, None], ...] = ({}, {}, {}, {})
+        for parsed in parsed_files:
+            for target, sources in zip(keys, ((parsed.teacher_rows, parsed.teachers_subjects, parsed.teachers_classes),
+                                              (parsed.class_rows, parsed.classes_teachers),
+                                              (parsed.materials_teachers,), (parsed.room_rows,))):
+                for source in sources:
+                    target.update(dict.fromkeys(source))
+        return keys
+
+    def _reindex_version(self, name: str) -> None:
+        """Rebuild a parked version's indexes after row ids moved under it,
+        without making it current (the query cache is left alone)."""
+        current = {field: getattr(self, field) for field in self._VERSION_FIELDS}
+        for field, value in self._versions[name].items():
+            setattr(self, field, value)
+        try:
+            self._reindex_all()
+            self._versions[name] = {field: getattr(self, field) for field in self._VERSION_FIELDS}
+        finally:
+            for field, value in current.items():
+                setattr(self, field, value)
+        self._stale_versions.discard(name)
+
+    def _version_slots(self, name: str, kind: str) -> Dict[str, Dict[int, List[int]]]:
+        if name != self.version and name in self._stale_versions:
+            self._reindex_version(name)
+        if name == self.version:
+            return self._slot_index(kind)[0]
+        if name not in self._versions:
+            raise KeyError(f"unknown timetable version: {name!r}")
+        return self._versions[name][f'{kind}_slots']
+
+    def diff_versions(self, old: str, new: str, kinds: Iterable[str] = ('teacher', 'class')
+                      ) -> Dict[str, Dict[str, List[SessionChange]]]:
+        """Sessions moved, added and removed from version ``old`` to ``new``,
+        as kind -> teacher/class -> changes in week order. Only entities that
+        changed are listed."""
+        out: Dict[str, Dict[str, List[SessionChange]]] = {}
+        for kind in kinds:
+            before, after = self._version_slots(old, kind), self._version_slots(new, kind)
+            by_entity: Dict[str, List[SessionChange]] = {}
+            for entity in sorted(before.keys() | after.keys()):
+                found = diff_entity(kind, entity, before.get(entity, {}), self.activities,
+                                    after.get(entity, {}), self.activities)
+                if found:
+                    by_entity[entity] = found
+            out[kind] = by_entity
+        return out
+
+    # ----------------- editing -----------------
+    EDITABLE_FIELDS = ('weekday', 'start_hour', 'duration', 'room', 'period')
+
+    def update_activity(self, row: int, **changes: Any) -> int:
+        """Change one session in place, e.g. a room swap or a time fix.
+        ``row`` is a record's ``.row``; teacher and class views share the row so
+        both show the change. Re-importing the source file replaces it.
+        Returns the row edited: a new one if the file's rows were shared with
+        another timetable version, which keeps them unchanged.
+        """
+        bad = set(changes) - set(self.EDITABLE_FIELDS)
+        if bad:
+            raise ValueError(f"non-editable activity fields: {sorted(bad)}")
+        table = self.activities
+        key, owner = next((k, p) for k, p in self._parsed_files.items() if p.base <= row < p.base + p.total)
+        if any(owner is p for state in self._versions.values() for p in state['_parsed_files'].values()):
+            # this version edits a copy of the file's rows of its own
+            own = owner.attached_copy(table)
+            row += own.base - owner.base
+            self._parsed_files[key] = owner = own
+            self._rebuild_entries(*self._keys_of([own]))
+        # an edited file no longer matches its source, so it is never shared
+        owner.edited = True
+        old_room = table.get(row, 'room')
+        for field, value in changes.items():
+            table.set(row, field, value)
+        new_room = table.get(row, 'room')
+        if new_room != old_room:
+            # the room lists live in the file the row came from
+            if old_room:
+                rows = array('I', [r for r in owner.room_rows[old_room] if r != row])
+                if rows:
+                    owner.room_rows[old_room] = rows
+                else:
+                    del owner.room_rows[old_room]
+            if new_room:
+                owner.room_rows[new_room] = array('I', sorted(owner.room_rows.get(new_room, []) + [row]))
+        if new_room != old_room or {'weekday', 'start_hour', 'duration'} & set(changes):
+            self._rebuild_entries((), (), (), [r for r in (old_room, new_room) if r])
+        if {'weekday', 'start_hour', 'duration'} & set(changes):
+            self._index_slots('teacher', [table.get(row, 'teacher')])
+            self._index_teacher_days([table.get(row, 'teacher')])
+            main_class = self.extract_main_class(table.get(row, 'class'))
+            if self.is_real_class(main_class):
+                self._index_slots('class', [main_class])
+        self.query_cache.bump()
+        return row
+
     # ----------------- query helpers -----------------
+    @property
+    def generation(self) -> int:
+        """Incremented on every import, snapshot load and activity edit."""
+        return self.query_cache.generation
+
+    @cached_query
+    def teacher_subjects(self, teacher: str) -> List[str]:
+        """Subjects a teacher teaches, sorted."""
+        return list(self.teachers_subjects.get(teacher, []))
+
+    @cached_query
+    def class_summaries(self) -> List[tuple]:
+        """``(class, teacher count, session count)`` for every class, sorted by class."""
+        return [(c, len(self.classes_teachers.get(c, [])), len(self.classes_timetable[c]))
+                for c in sorted(self.classes_timetable)]
+
+    @cached_query
+    def stats(self) -> Dict[str, int]:
+        """Counts shown on the main window's cards."""
+        return {'subjects': len(self.materials_teachers), 'teachers': len(self.timetable_data),
+                'classes': len(self.classes_timetable), 'rooms': len(self.rooms_timetable),
+                'activities': sum(len(v) for v in self.timetable_data.values()),
+                'conflicts': sum(len(found) for by_entity in self.conflicts.values()
+                                 for found in by_entity.values())}
+
+    def _slot_index(self, kind: str) -> tuple:
+        """``(slots, busy bitmaps, record type)`` for 'teacher', 'class' or 'room'."""
+        if kind == 'teacher':
+            return self.teacher_slots, self.teacher_busy, ActivityRecord
+        if kind == 'class':
+            return self.class_slots, self.class_busy, ClassActivityRecord
+        if kind == 'room':
+            return self.room_slots, self.room_busy, ClassActivityRecord
+        raise ValueError(f"unknown timetable kind: {kind!r}")
+
+    def search(self, text: str, kinds: Optional[Iterable[str]] = None, limit: Optional[int] = 50) -> List[tuple]:
+        """``(kind, name)`` of teachers, subjects, classes and rooms matching
+        ``text`` (Arabic-folded, titles ignored), best matches first."""
+        return self.search_index.search(text, kinds, limit)
+
+    def activities_at(self, entity: str, weekday: int, hour: int, kind: str = 'teacher') -> List[ActivityRecord]:
+        """Sessions of a teacher (``kind='teacher'``), class (``kind='class'``) or
+        room (``kind='room'``) that cover ``hour`` on ``weekday``, in timetable order."""
+        slots, _busy, record_type = self._slot_index(kind)
+        rows = slots.get(entity, {}).get(weekday * HOURS_PER_DAY + hour, ())
+        return [record_type(self.activities, row) for row in rows]
+
+    @cached_query
+    def conflicts_by_slot(self) -> Dict[tuple, List[Conflict]]:
+        """Every double-booking found at import, keyed by ``(weekday, hour)`` in week order."""
+        out: Dict[tuple, List[Conflict]] = {}
+        for by_entity in self.conflicts.values():
+            for found in by_entity.values():
+                for c in found:
+                    out.setdefault((c.weekday, c.hour), []).append(c)
+        return {slot: out[slot] for slot in sorted(out)}
+
+    @cached_query
+    def workload(self) -> Workload:
+        """Weekly scheduled hours per teacher, teacher x subject, class x subject
+        and room, computed in one vectorized pass over the activity table."""
+        return compute_workload(self.activities,
+                                {t: v.ids for t, v in self.timetable_data.items()},
+                                {c: v.ids for c, v in self.classes_timetable.items()},
+                                {r: v.ids for r, v in self.rooms_timetable.items()})
+
+    @cached_query
+    def schedule_shapes(self) -> Dict[str, Dict[str, ScheduleShape]]:
+        """Idle gaps, daily span and split days of every teacher and class
+        (``{'teacher': {...}, 'class': {...}}``), read off the occupancy bitmaps."""
+        memo: Dict[int, tuple] = {}
+        return {'teacher': compute_schedule_shapes(self.teacher_busy, memo),
+                'class': compute_schedule_shapes(self.class_busy, memo)}
+
+    # ----------------- occupancy queries -----------------
+    def free_at(self, weekday: int, hour: int, kind: str = 'teacher') -> Set[str]:
+        """Teachers (or classes, rooms) with no session covering ``hour`` on ``weekday``."""
+        return set(self._slot_index(kind)[0]) - self.slot_occupants[kind].get(weekday * HOURS_PER_DAY + hour, set())
+
+    def find_substitutes(self, weekday: int, hour: int, subject: Optional[str] = None,
+                         class_name: Optional[str] = None, exclude: Iterable[str] = ()) -> List[Substitute]:
+        """Teachers free at ``(weekday, hour)``, best candidates first: those who
+        teach ``subject``, then those already teaching ``class_name``, then those
+        at school that day, least loaded first."""
+        free = self.free_at(weekday, hour) - set(exclude)
+        subject_teachers = set(self.materials_teachers.get(subject, ())) if subject else set()
+        main_class = self.extract_main_class(class_name) if class_name else None
+        class_teachers = set(self.classes_teachers.get(main_class, ())) if main_class else set()
+        shift, busy = weekday * HOURS_PER_DAY, self.teacher_busy
+        day_mask = (1 << HOURS_PER_DAY) - 1
+        out = [Substitute(t, t in subject_teachers, t in class_teachers,
+                          bin((busy.get(t, 0) >> shift) & day_mask).count('1'))
+               for t in free]
+        out.sort(key=lambda c: (not c.teaches_subject, not c.teaches_class, c.daily_load == 0, c.daily_load,
+                                c.teacher))
+        return out
+
+    def busy_bits(self, names: Iterable[str], kind: str = 'teacher') -> int:
+        """Union of the weekly occupancy bitmaps of ``names``."""
+        busy = self._slot_index(kind)[1]
+        bits = 0
+        for name in names:
+            bits |= busy.get(name, 0)
+        return bits
+
+    def is_free(self, name: str, weekday: int, hour: int, kind: str = 'teacher') -> bool:
+        return not self._slot_index(kind)[1].get(name, 0) & slot_bit(weekday, hour)
+
+    def is_room_free(self, room: str, weekday: int, hour: int) -> bool:
+        return self.is_free(room, weekday, hour, kind='room')
+
+    def common_free_slots(self, names: Iterable[str], kind: str = 'teacher',
+                          within: int = SCHOOL_WEEK_MASK) -> List[tuple]:
+        """``(weekday, hour)`` slots of ``within`` where none of ``names`` is busy."""
+        return slots_of(within & ~self.busy_bits(names, kind))
+
+    def overlap_slots(self, a: str, a_kind: str, b: str, b_kind: str) -> List[tuple]:
+        """Slots where both entities are busy, e.g. class 4M1 and a teacher."""
+        return slots_of(self._slot_index(a_kind)[1].get(a, 0) & self._slot_index(b_kind)[1].get(b, 0))
+
+    @cached_query
+    def build_teacher_grid(self, teacher: str) -> List[List[str]]:
+        """Weekly grid of a teacher, in the row/column layout the timetable windows use."""
+        table = self.activities
+        strings = table.pool.strings
+
+        def cell(row: int) -> str:
+            subj = strings[table.subject[row]] or ""
+            clas = strings[table.class_[row]] or ""
+            room = strings[table.room[row]] or ""
+            if subj:
+                return f"{subj}\n[{clas}] ({room})" if (clas or room) else subj
+            return f"[{clas}] ({room})" if (clas or room) else ""
+
+        return self._build_grid(self.teacher_slots.get(teacher, {}), cell)
+
+    @cached_query
+    def build_class_grid(self, class_name: str) -> List[List[str]]:
+        """Weekly grid of a class, in the row/column layout the timetable windows use."""
+        table = self.activities
+        strings = table.pool.strings
+
+        def cell(row: int) -> str:
+            subj = strings[table.subject[row]] or ""
+            teacher = strings[table.teacher[row]] or ""
+            room = strings[table.room[row]] or ""
+            if subj and teacher:
+                return f"{subj}\n{teacher}\n({room})" if room else f"{subj}\n{teacher}"
+            return subj
+
+        return self._build_grid(self.class_slots.get(class_name, {}), cell)
+
+    @staticmethod
+    def _build_grid(slots: Dict[int, List[int]], cell) -> List[List[str]]:
+        """Header row, one row per morning hour, a "—" separator, then the
+        afternoon hours; each cell shows the first session covering that slot."""
+        data = [["الساعة / اليوم"] + [DAYS_AR[d] for d in GRID_DAYS_ORDER]]
+        for hours in (GRID_MORNING_HOURS, None, GRID_AFTERNOON_HOURS):
+            if hours is None:
+                data.append(["—"] + ["" for _ in GRID_DAYS_ORDER])
+                continue
+            for h in hours:
+                row = [f"{h:02d}:00 - {h + 1:02d}:00"]
+                for d in GRID_DAYS_ORDER:
+                    rows = slots.get(d * HOURS_PER_DAY + h)
+                    row.append(cell(rows[0]) if rows else "")
+                data.append(row)
+        return data
+
     def sessions_for_prof_on_date(self, prof: str, date_obj) -> Optional[List[Dict[str, Any]]]:
-        if prof not in self.timetable_data:
+        days = self.teacher_days.get(prof)
+        if days is None:
             return None
-        wd = date_obj.weekday()
-        sessions: List[Dict[str, Any]] = []
-        for s in self.timetable_data.get(prof, []):
-            s_wd = s.get('weekday')
-            s_start = s.get('start_hour')
-            s_dur = s.get('duration', 1)
-            if s_start is None:
-                continue
-            if s_wd is not None and s_wd != wd:
-                continue
-            for h in range(s_start, s_start + max(1, s_dur)):
-                if 8 <= h <= 20:
-                    sessions.append({'start_hour': h, 'subject': s.get('subject', ''), 'room': s.get('room', ''), 'class': s.get('class', '')})
-        uniq = {it['start_hour']: it for it in sessions}
-        return [uniq[h] for h in sorted(uniq.keys())]
+        return [self._session(hour, row) for hour, row in days[date_obj.weekday()]]
+
+    def sessions_for_range(self, teachers: Iterable[str], start: date, end: date
+                           ) -> Iterator[Tuple[date, int, Dict[str, Any]]]:
+        """Lazily yield ``(date, hour, session)`` for every expected session of
+        ``teachers`` from ``start`` to ``end`` (both included), by date, then in
+        the given teacher order, then by hour. Sessions are the dicts of
+        sessions_for_prof_on_date() plus the ``teacher``."""
+        if isinstance(teachers, str):
+            teachers = [teachers]
+        schedule = [(t, self.teacher_days[t]) for t in teachers if t in self.teacher_days]
+        day = start
+        while day <= end:
+            wd = day.weekday()
+            for teacher, days in schedule:
+                for hour, row in days[wd]:
+                    session = self._session(hour, row)
+                    session['teacher'] = teacher
+                    yield day, hour, session
+            day += ONE_DAY
+
+    def _session(self, hour: int, row: int) -> Dict[str, Any]:
+        table = self.activities
+        strings = table.pool.strings
+        return {'start_hour': hour, 'subject': strings[table.subject[row]], 'room': strings[table.room[row]],
+                'class': strings[table.class_[row]]}
+
+
+class Substitute(NamedTuple):
+    """One candidate returned by DataManager.find_substitutes()."""
+    teacher: str
+    teaches_subject: bool
+    teaches_class: bool
+    daily_load: int        # hours already taught that weekday
+
+
+class FieldDecoder:
+    """Memoized decoder for FET Day/Hour labels such as ``"02 الأحد م"`` / ``"3"``.
+    An export has only a few dozen distinct (Day, Hour) pairs, so each pair is
+    parsed once into ``(weekday, period, start_hour)`` and then looked up.
+    """
+
+    def __init__(self):
+        self._cache: Dict[tuple, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, day_raw: str, hour_raw: str) -> tuple:
+        key = (day_raw, hour_raw)
+        decoded = self._cache.get(key)
+        if decoded is None:
+            self.misses += 1
+            decoded = self._cache[key] = self.parse(day_raw, hour_raw)
+        else:
+            self.hits += 1
+        return decoded
+
+    @staticmethod
+    def parse(day_raw: str, hour_raw: str) -> tuple:
+        day_str = str(day_raw)
+        period = None
+        if ' ص' in day_str:
+            period = 'morning'
+        elif ' م' in day_str:
+            period = 'afternoon'
+        day_clean = re.sub(r'\s*[مص]\s*$', '', day_str).strip()
+        wd = DataManager.extract_weekday(day_clean)
+        start_hour = DataManager.hour_from_field_enhanced(hour_raw, period)
+        return wd, period, start_hour
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ParsedFile:
+    """Partial import result for a single CSV file.
+    Built by ``parse_fet_csv_file`` (possibly in a worker process) and merged
+    into DataManager in path order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.source_file = os.path.basename(path)
+        # one row per (activity, teacher); moved into DataManager.activities on merge,
+        # after which the row lists below hold table ids starting at ``base``
+        self.table: Optional[ActivityTable] = ActivityTable()
+        self.base = 0
+        self.teacher_rows: Dict[str, array] = {}
+        self.class_rows: Dict[str, array] = {}
+        self.room_rows: Dict[str, array] = {}
+        self.materials_teachers: Dict[str, Set[str]] = {}
+        self.teachers_subjects: Dict[str, Set[str]] = {}
+        self.teachers_classes: Dict[str, Set[str]] = {}
+        self.classes_teachers: Dict[str, Set[str]] = {}
+        self.total = 0
+        self.report = FileReport(path)
+        self.decoder = FieldDecoder()
+        # teachers are keyed by teacher_key() until DataManager maps them to
+        # canonical IDs on merge; first raw spelling seen for each key
+        self.names = TeacherNameCanonicalizer()
+        self.teacher_spellings: Dict[str, str] = {}
+        # rows changed by DataManager.update_activity since the import
+        self.edited = False
+
+    def attached_copy(self, table: ActivityTable) -> 'ParsedFile':
+        """A copy of this attached file with its rows appended to ``table``
+        again, for one timetable version to edit without touching the others."""
+        other = copy.copy(self)
+        other.base = table.extend(table, self.base, self.base + self.total)
+        delta = other.base - self.base
+        for name in ('teacher_rows', 'class_rows', 'room_rows'):
+            setattr(other, name, {k: array('I', [r + delta for r in rows]) for k, rows in getattr(self, name).items()})
+        for name in ('materials_teachers', 'teachers_subjects', 'teachers_classes', 'classes_teachers'):
+            setattr(other, name, {k: set(values) for k, values in getattr(self, name).items()})
+        return other
+
+    def rename_teachers(self, mapping: Dict[str, str]) -> None:
+        """Re-key every teacher reference (before the rows leave ``self.table``).
+        Keys mapped to the same ID are merged, keeping row order."""
+        def rekey_rows(rows_by_key: Dict[str, array]) -> Dict[str, array]:
+            out: Dict[str, array] = {}
+            for key, rows in rows_by_key.items():
+                name = mapping[key]
+                if name in out:
+                    out[name] = array('I', sorted(out[name] + rows))
+                else:
+                    out[name] = rows
+            return out
+
+        def rekey_sets(sets_by_key: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+            out: Dict[str, Set[str]] = {}
+            for key, values in sets_by_key.items():
+                out.setdefault(mapping[key], set()).update(values)
+            return out
+
+        self.teacher_rows = rekey_rows(self.teacher_rows)
+        self.teachers_subjects = rekey_sets(self.teachers_subjects)
+        self.teachers_classes = rekey_sets(self.teachers_classes)
+        for sets_by_key in (self.materials_teachers, self.classes_teachers):
+            for k, teachers in sets_by_key.items():
+                sets_by_key[k] = {mapping[t] for t in teachers}
+        pool = self.table.pool
+        recode = {c: pool.code(mapping[pool.strings[c]]) for c in set(self.table.teacher)}
+        self.table.teacher = array('I', map(recode.__getitem__, self.table.teacher))
+
+
+def iter_fet_activities(path: str, names: TeacherNameCanonicalizer, decoder: Optional[FieldDecoder] = None,
+                        canonical: bool = True, report: Optional[FileReport] = None) -> Iterator[Activity]:
+    """Yield one ``Activity`` per (row, teacher) of a FET CSV.
+    With ``canonical=False`` teachers are left as ``teacher_key()`` match keys
+    and ``names`` is only used for its pure, memoized splitting (import workers).
+    ``report`` receives row counts, rejected rows and per-stage seconds; the
+    time the consumer spends between two rows is counted as ``index``.
+    """
+    decoder = decoder or FieldDecoder()
+    decode = decoder.decode
+    teacher_keys_of = names.keys
+    resolve = names.resolve
+    # skips NamedTuple's Python-level __new__; this is the per-row hot path
+    new_activity = tuple.__new__
+    source_file = os.path.basename(path)
+    report = report if report is not None else FileReport(path)
+    rejected = report.rejected
+    decoder_hits, decoder_misses = decoder.hits, decoder.misses
+    name_hits, name_misses = names.hits, names.misses
+    clock = perf_counter
+    t_read = t_decode = t_normalize = t_index = 0.0
+    rows = 0
+    t0 = clock()
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            for row_num, (act_id, day_raw, hour_raw, subject, teachers_raw, students_set, room,
+                          duration_raw) in read_fet_rows(f):
+                t1 = clock()
+                t_read += t1 - t0
+                rows += 1
+                # index keys are interned; the table's string pool interns the rest
+                subject = intern(subject.strip())
+                teachers_raw = teachers_raw.strip()
+                students_set = students_set.strip()
+                room = room.strip()
+
+                if not any([day_raw, hour_raw, teachers_raw]):
+                    rejected.append(RejectedRow(source_file, row_num, 'empty', ''))
+                    t0 = clock()
+                    t_normalize += t0 - t1
+                    continue
+                teacher_keys = teacher_keys_of(teachers_raw)
+                if not teacher_keys:
+                    rejected.append(RejectedRow(source_file, row_num, 'no_teacher', teachers_raw))
+                    t0 = clock()
+                    t_normalize += t0 - t1
+                    continue
+                main_class = None
+                if students_set:
+                    main_class = DataManager.extract_main_class(students_set)
+                    if not DataManager.is_real_class(main_class):
+                        main_class = None
+                t2 = clock()
+                t_normalize += t2 - t1
+
+                wd, period, start_hour = decode(day_raw, hour_raw)
+                if wd is None:
+                    rejected.append(RejectedRow(source_file, row_num, 'bad_day', day_raw))
+                if start_hour is None:
+                    rejected.append(RejectedRow(source_file, row_num, 'bad_hour', hour_raw))
+                duration = 1
+                if duration_raw:
+                    try:
+                        duration = int(duration_raw)
+                    except Exception:
+                        rejected.append(RejectedRow(source_file, row_num, 'bad_duration', duration_raw))
+                        duration = 1
+                t3 = clock()
+                t_decode += t3 - t2
+
+                seen: Set[str] = set()
+                for teacher, spelling in teacher_keys:
+                    if canonical:
+                        teacher = resolve(teacher, spelling)
+                        if teacher in seen:
+                            continue
+                        seen.add(teacher)
+                    yield new_activity(Activity, (teacher, wd, start_hour, duration, subject, room, students_set,
+                                                  main_class, act_id or None, period, source_file, row_num,
+                                                  day_raw, hour_raw, spelling))
+                t0 = clock()
+                t_index += t0 - t3
+    finally:
+        report.rows += rows
+        seconds = report.seconds
+        seconds['read'] += t_read
+        seconds['decode'] += t_decode
+        seconds['normalize'] += t_normalize
+        seconds['index'] += t_index
+        report.decoder_hits += decoder.hits - decoder_hits
+        report.decoder_misses += decoder.misses - decoder_misses
+        report.name_hits += names.hits - name_hits
+        report.name_misses += names.misses - name_misses
 
 
+def parse_fet_csv_file(path: str) -> ParsedFile:
+    """Parse one FET CSV into a ParsedFile. Module-level so it can run in a process pool."""
+    parsed = ParsedFile(path)
+    table = parsed.table
+    spellings = parsed.teacher_spellings
+    for act in iter_fet_activities(path, parsed.names, parsed.decoder, canonical=False, report=parsed.report):
+        teacher, subject, main_class = act.teacher, act.subject, act.main_class
+        if teacher not in spellings:
+            spellings[teacher] = act.teacher_spelling
+        if subject:
+            parsed.materials_teachers.setdefault(subject, set()).add(teacher)
+            parsed.teachers_subjects.setdefault(teacher, set()).add(subject)
+        if main_class:
+            parsed.teachers_classes.setdefault(teacher, set()).add(main_class)
+            parsed.classes_teachers.setdefault(main_class, set()).add(teacher)
+        row = table.append(act.weekday, act.start_hour, act.duration, subject, act.room, act.class_,
+                           act.activity_id, act.source_file, act.original_hour_field,
+                           act.original_day_field, act.period, teacher)
+        parsed.teacher_rows.setdefault(teacher, array('I')).append(row)
+        if main_class:
+            parsed.class_rows.setdefault(main_class, array('I')).append(row)
+        if act.room:
+            parsed.room_rows.setdefault(act.room, array('I')).append(row)
+        parsed.total += 1
+    parsed.report.activities = parsed.total
+    return parsed
@@ -0,0 +1,84 @@
+"""Shape of each day of a timetable: span, idle gaps and morning/afternoon splits.
+
+Computed straight from the weekly occupancy bitmaps (see core.occupancy), one
+24-bit day at a time. The same day pattern recurs across many teachers and
+classes, so each distinct day mask is analysed once per call.
+
+Gaps and idle hours are counted within the morning and within the afternoon:
+the lunch break between them is part of every split day, not a hole a
+timetable could fill.
+"""
+from __future__ import annotations
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from core.occupancy import HOURS_PER_DAY
+
+DAY_MASK = (1 << HOURS_PER_DAY) - 1
+# hours before noon; a day with sessions on both sides of it is a split day
+MORNING_MASK = (1 << 12) - 1
+
+
+class DayShape(NamedTuple):
+    weekday: int
+    first_hour: int
+    last_hour: int
+    busy_hours: int
+    gaps: int           # idle stretches between sessions of the same half-day
+    idle_hours: int     # free hours inside those stretches
+    split: bool         # sessions both in the morning and in the afternoon
+
+    @property
+    def span(self) -> int:
+        return self.last_hour - self.first_hour + 1
+
+
+class ScheduleShape(NamedTuple):
+    entity: str
+    days: Tuple[DayShape, ...]      # working days only, in weekday order
+    gaps: int
+    idle_hours: int
+    split_days: int
+    max_span: int
+
+
+def _holes(mask: int) -> Tuple[int, int]:
+    """(gaps, idle hours) between the first and last set bit of ``mask``."""
+    if not mask:
+        return 0, 0
+    low = (mask & -mask).bit_length() - 1
+    busy = bin(mask).count('1')
+    # every run of busy hours starts at a bit whose lower neighbour is free
+    runs = bin(mask & ~(mask << 1)).count('1')
+    return runs - 1, mask.bit_length() - low - busy
+
+
+def _day(mask: int) -> Tuple[int, int, int, int, int, bool]:
+    first = (mask & -mask).bit_length() - 1
+    last = mask.bit_length() - 1
+    morning, afternoon = mask & MORNING_MASK, mask >> 12
+    morning_gaps, morning_idle = _holes(morning)
+    afternoon_gaps, afternoon_idle = _holes(afternoon)
+    return (first, last, bin(mask).count('1'), morning_gaps + afternoon_gaps, morning_idle + afternoon_idle,
+            bool(morning and afternoon))
+
+
+def compute_schedule_shapes(busy: Dict[str, int], memo: Optional[Dict[int, tuple]] = None) -> Dict[str, ScheduleShape]:
+    """Shape of every entity's week from its occupancy bitmap, in one pass."""
+    memo = {} if memo is None else memo
+    out: Dict[str, ScheduleShape] = {}
+    for entity, bits in busy.items():
+        days = []
+        weekday = 0
+        while bits:
+            mask = bits & DAY_MASK
+            if mask:
+                day = memo.get(mask)
+                if day is None:
+                    day = memo[mask] = _day(mask)
+                days.append(DayShape(weekday, *day))
+            bits >>= HOURS_PER_DAY
+            weekday += 1
+        out[entity] = ScheduleShape(entity, tuple(days), sum(d.gaps for d in days),
+                                    sum(d.idle_hours for d in days), sum(d.split for d in days),
+                                    max((d.span for d in days), default=0))
+    return out
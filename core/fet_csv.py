@@ -0,0 +1,96 @@
+"""FET CSV header schema: resolve column aliases to indices once per file.
+Keep Arabic/French column names intact; they come straight from FET exports.
+"""
+from __future__ import annotations
+import csv
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+# logical field -> accepted header names, in lookup priority order
+COLUMN_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'activity_id': ('Activity Id', 'ActivityId', 'ID', 'Id Activité', 'رقم النشاط'),
+    'day': ('Day', 'day', 'اليوم', 'Jour'),
+    'hour': ('Hour', 'Period', 'الساعة', 'Heure'),
+    'subject': ('Subject', 'subject', 'المادة', 'Matière'),
+    'teachers': ('Teachers', 'Teacher', 'الأستاذ', 'الأساتذة', 'Enseignants', 'Enseignant'),
+    'students': ('Students Sets', 'Students', 'Classe', 'الصف', 'القسم', 'Classes'),
+    'room': ('Room', 'Classroom', 'القاعة', 'Salle'),
+    'duration': ('Duration', 'المدة', 'Durée'),
+}
+
+# order of the values returned by HeaderSchema.values()
+FIELDS: Tuple[str, ...] = tuple(COLUMN_ALIASES.keys())
+
+
+def sniff_delimiter(header_line: str) -> str:
+    if '\t' in header_line:
+        return '\t'
+    if ';' in header_line and header_line.count(';') > header_line.count(','):
+        return ';'
+    return ','
+
+
+class HeaderSchema:
+    """Column indices for every logical field of one CSV file.
+
+    Built once from the header row; ``values(row)`` then returns a tuple of raw
+    strings in ``FIELDS`` order ('' for missing columns or short rows), with the
+    same "first non-empty alias wins" rule the old ``row.get(a) or row.get(b)``
+    chains had.
+    """
+
+    def __init__(self, header: Sequence[str]):
+        names = [str(h).strip().casefold() for h in header]
+        self.width = len(names)
+        self.columns: Dict[str, List[int]] = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            idx: List[int] = []
+            for alias in aliases:
+                key = alias.casefold()
+                if key in names:
+                    i = names.index(key)
+                    if i not in idx:
+                        idx.append(i)
+            self.columns[field] = idx
+        # missing fields read the '' pad appended at position ``width``
+        primary = [self.columns[f][0] if self.columns[f] else self.width for f in FIELDS]
+        self._getter = itemgetter(*primary)
+        self._fallbacks = [(pos, idx[1:]) for pos, idx in enumerate(self.columns[f] for f in FIELDS) if len(idx) > 1]
+
+    def has(self, field: str) -> bool:
+        return bool(self.columns.get(field))
+
+    def values(self, row: List[str]) -> Tuple[str, ...]:
+        n = len(row)
+        if n != self.width:
+            if n > self.width:
+                row = row[:self.width]
+            else:
+                row = row + [''] * (self.width - n)
+        row.append('')
+        vals = self._getter(row)
+        for pos, extra in self._fallbacks:
+            if not vals[pos]:
+                for i in extra:
+                    if row[i]:
+                        vals = vals[:pos] + (row[i],) + vals[pos + 1:]
+                        break
+        return vals
+
+
+def read_fet_rows(f: TextIO) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+    """Yield ``(row_num, values)`` for every non-empty data row of an open FET CSV."""
+    header_line = f.readline()
+    f.seek(0)
+    reader = csv.reader(f, delimiter=sniff_delimiter(header_line))
+    header: Optional[List[str]] = next(reader, None)
+    if not header:
+        return
+    schema = HeaderSchema(header)
+    values = schema.values
+    row_num = 0
+    for row in reader:
+        if not row:
+            continue
+        row_num += 1
+        yield row_num, values(row)
@@ -0,0 +1,151 @@
+"""Structured report of a FET CSV import: where the time went and which rows were rejected.
+
+Every import leaves an ``ImportReport`` on ``DataManager.last_import_report``.
+It has one ``FileReport`` per source file, with seconds spent in each stage,
+rows/s, the hit rates of the Day/Hour and teacher-name caches and the rejected
+rows with their reasons.
+"""
+from __future__ import annotations
+import os
+from typing import Dict, List, NamedTuple, Tuple
+
+# read: CSV tokenizing; normalize: field cleanup, teacher names, class labels;
+# decode: Day/Hour labels; index: table rows and relations; finalize: merge into DataManager
+STAGES: Tuple[str, ...] = ('read', 'decode', 'normalize', 'index', 'finalize')
+
+# reason code -> label shown in the UI
+REJECT_REASONS: Dict[str, str] = {
+    'empty': 'صف فارغ (بدون يوم أو ساعة أو أستاذ)',
+    'no_teacher': 'بدون أستاذ',
+    'bad_day': 'يوم غير مفهوم',
+    'bad_hour': 'ساعة غير مفهومة',
+    'bad_duration': 'مدة غير صالحة (اعتبرت 1)',
+}
+# reasons whose rows are dropped; the others are kept but cannot be placed in the grid
+SKIPPED_REASONS = frozenset(('empty', 'no_teacher'))
+
+
+class RejectedRow(NamedTuple):
+    source_file: str
+    row_num: int     # data row number, 1 = first row after the header
+    reason: str      # key of REJECT_REASONS
+    detail: str      # the offending raw value(s)
+
+
+def _rate(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+
+class FileReport:
+    """Counters and stage timings for one source file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0            # CSV data rows read
+        self.activities = 0      # (activity, teacher) sessions produced
+        self.seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.rejected: List[RejectedRow] = []
+        self.decoder_hits = self.decoder_misses = 0
+        self.name_hits = self.name_misses = 0
+        # False when the file was unchanged and its earlier parse was reused
+        self.reparsed = True
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    @property
+    def rows_per_sec(self) -> float:
+        t = self.total_seconds
+        return self.rows / t if t else 0.0
+
+    @property
+    def decoder_hit_rate(self) -> float:
+        return _rate(self.decoder_hits, self.decoder_misses)
+
+    @property
+    def name_hit_rate(self) -> float:
+        return _rate(self.name_hits, self.name_misses)
+
+
+class ImportReport:
+    """Result of one ``import_fet_activities_csv_files`` call."""
+
+    def __init__(self):
+        self.files: List[FileReport] = []
+        self.removed: List[str] = []
+        # double-booked (entity, slot) pairs in the resulting timetable
+        self.conflicts = 0
+        # rebuilding the merged structures and writing the snapshot, for all files at once
+        self.finalize_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def reparsed(self) -> List[FileReport]:
+        return [f for f in self.files if f.reparsed]
+
+    @property
+    def rows(self) -> int:
+        return sum(f.rows for f in self.reparsed)
+
+    @property
+    def activities(self) -> int:
+        return sum(f.activities for f in self.files)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def stage_seconds(self) -> Dict[str, float]:
+        totals = dict.fromkeys(STAGES, 0.0)
+        for f in self.reparsed:
+            for stage, t in f.seconds.items():
+                totals[stage] += t
+        totals['finalize'] += self.finalize_seconds
+        return totals
+
+    @property
+    def decoder_hit_rate(self) -> float:
+        files = self.reparsed
+        return _rate(sum(f.decoder_hits for f in files), sum(f.decoder_misses for f in files))
+
+    @property
+    def name_hit_rate(self) -> float:
+        files = self.reparsed
+        return _rate(sum(f.name_hits for f in files), sum(f.name_misses for f in files))
+
+    @property
+    def rejected(self) -> List[RejectedRow]:
+        return [r for f in self.files for r in f.rejected]
+
+    def reason_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for r in self.rejected:
+            counts[r.reason] = counts.get(r.reason, 0) + 1
+        return counts
+
+    def summary(self, max_rows: int = 5) -> str:
+        """Multi-line Arabic summary for message boxes."""
+        lines = [f"آخر استيراد: {self.activities} حصة من {len(self.files)} ملف "
+                 f"({len(self.reparsed)} أعيد تحليلها) في {self.wall_seconds * 1000:.0f} ms"
+                 f" - {self.rows_per_sec:,.0f} صف/ث"]
+        stages = self.stage_seconds
+        lines.append("المراحل: " + ", ".join(f"{s} {stages[s] * 1000:.0f} ms" for s in STAGES))
+        lines.append(f"نسبة إصابة الذاكرة المؤقتة: أيام/ساعات {self.decoder_hit_rate:.0%}"
+                     f" - أسماء الأساتذة {self.name_hit_rate:.0%}")
+        if self.conflicts:
+            lines.append(f"⚠️ تعارضات في الجدول: {self.conflicts}")
+        for f in self.reparsed:
+            slowest = max(STAGES, key=f.seconds.__getitem__)
+            lines.append(f"  {os.path.basename(f.path)}: {f.rows} صف، {f.total_seconds * 1000:.0f} ms "
+                         f"(الأبطأ: {slowest})، مرفوض {len(f.rejected)}")
+        counts = self.reason_counts()
+        if counts:
+            lines.append("الصفوف المرفوضة: " + ", ".join(
+                f"{REJECT_REASONS.get(reason, reason)}: {n}" for reason, n in counts.items()))
+            for r in self.rejected[:max_rows]:
+                lines.append(f"  - {r.source_file} الصف {r.row_num}: {REJECT_REASONS.get(r.reason, r.reason)} '{r.detail}'")
+        return "\n".join(lines)
+
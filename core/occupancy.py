@@ -0,0 +1,34 @@
+"""Weekly occupancy bitmaps: one Python int per teacher, class or room.
+
+Bit ``weekday * HOURS_PER_DAY + hour`` is set when the entity has a session
+covering that hour, so "free for all of them", "busy for both" and similar
+questions are plain ``|``/``&``/``~`` on integers.
+"""
+from __future__ import annotations
+from typing import Iterable, List, Tuple
+
+HOURS_PER_DAY = 24
+
+
+def slot_bit(weekday: int, hour: int) -> int:
+    return 1 << (weekday * HOURS_PER_DAY + hour)
+
+
+def mask_of(days: Iterable[int], hours: Iterable[int]) -> int:
+    """Bitmap with every (day, hour) combination set."""
+    hours = tuple(hours)
+    bits = 0
+    for d in days:
+        for h in hours:
+            bits |= slot_bit(d, h)
+    return bits
+
+
+def slots_of(bits: int) -> List[Tuple[int, int]]:
+    """``(weekday, hour)`` of every set bit, in week order."""
+    out: List[Tuple[int, int]] = []
+    while bits:
+        low = bits & -bits
+        out.append(divmod(low.bit_length() - 1, HOURS_PER_DAY))
+        bits ^= low
+    return out
@@ -0,0 +1,53 @@
+"""Memoized read queries, invalidated by a generation counter.
+
+DataManager bumps the generation whenever its data changes (import, snapshot
+load, activity edit); a cached result from an older generation is recomputed
+on its next use. Cached values are shared between callers and must be treated
+as read-only.
+"""
+from __future__ import annotations
+import functools
+from typing import Any, Callable, Dict, Tuple
+
+
+class QueryCache:
+    def __init__(self):
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple, Tuple[int, Any]] = {}
+
+    def bump(self) -> int:
+        """Invalidate every cached result."""
+        self.generation += 1
+        self._entries.clear()
+        return self.generation
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == self.generation:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = compute()
+        self._entries[key] = (self.generation, value)
+        return value
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {'generation': self.generation, 'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._entries), 'hit_rate': self.hit_rate}
+
+
+def cached_query(method: Callable) -> Callable:
+    """Cache a DataManager method on ``(name, *args)`` in ``self.query_cache``."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        return self.query_cache.get_or_compute((name,) + args, lambda: method(self, *args))
+    return wrapper
@@ -0,0 +1,123 @@
+"""Type-ahead search over teacher names, subjects, classes and rooms.
+
+Names and queries are folded with ``fold_arabic`` (alef forms, taa marbuta,
+tashkeel) and titles such as الأستاذ/الأستاذة are ignored, so ``استاذة شنق``,
+``شنق`` and ``الأستاذة شنق`` find the same teacher. Query words of one or two
+letters match the start of a word through a prefix table; longer words match
+anywhere through a trigram table and are then checked against the folded name.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.teacher_names import TITLES, fold_arabic
+
+# (kind, name)
+Entry = Tuple[str, str]
+
+
+def fold_words(text: str) -> List[str]:
+    """Folded words of ``text`` without titles; digits are kept (``4M1``)."""
+    words = fold_arabic(text).replace('_', ' ').split()
+    return [w for w in words if w not in TITLES] or words
+
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """Incrementally maintained prefix/trigram index of ``(kind, name)`` entries."""
+
+    def __init__(self):
+        self.folded: Dict[Entry, str] = {}
+        self.prefixes: Dict[str, Set[Entry]] = {}    # 1-2 letter word prefixes
+        self.trigrams: Dict[str, Set[Entry]] = {}
+
+    def __len__(self) -> int:
+        return len(self.folded)
+
+    def _keys(self, folded: str) -> Tuple[Set[str], Set[str]]:
+        prefixes: Set[str] = set()
+        grams: Set[str] = set()
+        for word in folded.split():
+            prefixes.update((word[:1], word[:2]))
+            grams |= _trigrams(word)
+        return prefixes, grams
+
+    def add(self, kind: str, name: str) -> None:
+        entry = (kind, name)
+        if entry in self.folded:
+            return
+        folded = self.folded[entry] = ' '.join(fold_words(name))
+        prefixes, grams = self._keys(folded)
+        for p in prefixes:
+            self.prefixes.setdefault(p, set()).add(entry)
+        for g in grams:
+            self.trigrams.setdefault(g, set()).add(entry)
+
+    def discard(self, kind: str, name: str) -> None:
+        folded = self.folded.pop((kind, name), None)
+        if folded is None:
+            return
+        prefixes, grams = self._keys(folded)
+        for table, keys in ((self.prefixes, prefixes), (self.trigrams, grams)):
+            for k in keys:
+                entries = table.get(k)
+                if entries is not None:
+                    entries.discard((kind, name))
+                    if not entries:
+                        del table[k]
+
+    def sync(self, kind: str, names: Iterable[str], present) -> None:
+        """Add the ``names`` that are in ``present`` and drop the others."""
+        for name in names:
+            if name in present:
+                self.add(kind, name)
+            else:
+                self.discard(kind, name)
+
+    def search(self, text: str, kinds: Optional[Iterable[str]] = None, limit: Optional[int] = 50) -> List[Entry]:
+        """Entries matching every word of ``text``: names starting with the
+        query first, then word-start matches, then shorter names. A word that
+        is only the beginning of a title is ignored if nothing matches it."""
+        words = fold_words(text)
+        if not words:
+            return []
+        kinds = set(kinds) if kinds is not None else None
+        found = self._search(words, kinds, limit)
+        if not found:
+            # a title still being typed ("الأست") matches everything
+            rest = [w for w in words if len(w) < 3 or not any(t.startswith(w) for t in TITLES)]
+            if len(rest) < len(words):
+                if rest:
+                    return self._search(rest, kinds, limit)
+                entries = sorted(e for e in self.folded if kinds is None or e[0] in kinds)
+                return entries[:limit]
+        return found
+
+    def _search(self, words: List[str], kinds: Optional[Set[str]], limit: Optional[int]) -> List[Entry]:
+        candidates: Optional[Set[Entry]] = None
+        for word in sorted(words, key=len, reverse=True):
+            if len(word) < 3:
+                found = self.prefixes.get(word, set())
+            else:
+                postings = sorted((self.trigrams.get(g, set()) for g in _trigrams(word)), key=len)
+                found = set.intersection(*postings) if postings else set()
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return []
+        folded = self.folded
+        query = ' '.join(words)
+        hits = []
+        for entry in candidates:
+            if kinds is not None and entry[0] not in kinds:
+                continue
+            name = folded[entry]
+            name_words = name.split()
+            # short words were matched on word prefixes already; long ones on trigrams only
+            if not all(w in name if len(w) >= 3 else any(nw.startswith(w) for nw in name_words) for w in words):
+                continue
+            rank = 0 if name.startswith(query) else 1 if any(nw.startswith(words[0]) for nw in name_words) else 2
+            hits.append((rank, len(name), entry))
+        hits.sort()
+        return [entry for _rank, _len, entry in hits[:limit]]
@@ -0,0 +1,55 @@
+"""Binary snapshot of the parsed timetable, so startup does not need a CSV import.
+
+Layout: magic, format version, payload length and CRC32, then a pickled state
+dict. A snapshot with another version or a bad checksum is ignored.
+"""
+from __future__ import annotations
+import logging
+import os
+import pickle
+import struct
+import zlib
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "timetable_snapshot.bin"
+SNAPSHOT_MAGIC = b'FETSNP'
+# bump whenever the pickled state layout changes
+SNAPSHOT_VERSION = 11
+
+_HEADER = struct.Struct('<6sHQI')
+
+
+def write_snapshot(path: str, state: Dict[str, Any]) -> None:
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(payload), zlib.crc32(payload))
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Return the stored state, or None if the file is missing, stale or corrupt."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, version, length, crc = _HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                logger.info("تجاهل اللقطة %s: إصدار غير مطابق", path)
+                return None
+            payload = f.read(length)
+    except OSError:
+        return None
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        logger.warning("اللقطة %s تالفة، سيتم تجاهلها", path)
+        return None
+    try:
+        return pickle.loads(payload)
+    except Exception:
+        logger.exception("خطأ أثناء قراءة اللقطة %s", path)
+        return None
@@ -0,0 +1,177 @@
+"""Teacher-name canonicalization: one teacher ID however an export spells it.
+
+FET exports spell the same person as ``الأستاذة شنق عربية1``, ``شنق عربية`` or
+``الاستاذة شنق عربيه``. Names are matched on a folded key (Arabic letter forms,
+tashkeel, titles and suffix digits removed) and every key maps to one canonical
+ID through an alias table that is persisted as JSON, so IDs stay stable between
+imports and sessions.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import re
+from sys import intern
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEACHER_ALIASES_FILE = "teacher_aliases.json"
+
+TEACHER_SEPARATORS = re.compile(r'\s*(?:,|/|\+|؛|;|\||&| and )\s*')
+_TASHKEEL = re.compile('[\u064B-\u0652\u0670\u0640]')
+_DIGITS = re.compile(r'\d+')
+_ARABIC_FOLD = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ة': 'ه', 'ى': 'ي'})
+
+
+def fold_arabic(text: str) -> str:
+    """Fold Arabic letter variants and drop tashkeel/tatweel, then casefold."""
+    return _TASHKEEL.sub('', text).translate(_ARABIC_FOLD).casefold()
+
+
+# compared after fold_arabic()
+TITLES = frozenset(fold_arabic(t) for t in (
+    'الأستاذ', 'الأستاذة', 'أستاذ', 'أستاذة', 'أ.', 'السيد', 'السيدة',
+    'M.', 'Mr', 'Mme', 'Mlle', 'Prof',
+))
+
+
+def teacher_key(name: str) -> str:
+    """Matching key of a single teacher name: folded, without titles or digits."""
+    words = _DIGITS.sub(' ', fold_arabic(name)).split()
+    while len(words) > 1 and words[0] in TITLES:
+        words.pop(0)
+    return ' '.join(words)
+
+
+def display_name(name: str) -> str:
+    """Default display form, as ``DataManager.normalize_teacher_name`` has always
+    produced it: trailing digits dropped, first two words kept."""
+    first = re.sub(r'\s*\d+$', '', ' '.join(name.split())).strip()
+    words = first.split()
+    return " ".join(words[:2]) if len(words) >= 2 else first
+
+
+class TeacherNameCanonicalizer:
+    """Memoized raw-field -> canonical teacher IDs, backed by an alias table."""
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self.aliases: Dict[str, str] = {}    # teacher_key -> canonical ID
+        self._owners: Dict[str, str] = {}    # canonical ID -> first key that claimed it
+        self._keys_cache: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        for spelling, canonical in (aliases or {}).items():
+            self.add_alias(spelling, canonical)
+        self.dirty = False
+
+    # ----- persistence -----
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'TeacherNameCanonicalizer':
+        if not path or not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("تعذر قراءة جدول أسماء الأساتذة %s: %s", path, e)
+            return cls()
+
+    def save(self, path: str) -> bool:
+        try:
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.aliases, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+            self.dirty = False
+            return True
+        except OSError as e:
+            logger.warning("تعذر حفظ جدول أسماء الأساتذة %s: %s", path, e)
+            return False
+
+    def copy(self) -> 'TeacherNameCanonicalizer':
+        """An independent canonicalizer with the same alias table, for reads
+        whose new spellings must not be added to this one."""
+        other = TeacherNameCanonicalizer()
+        other.aliases = dict(self.aliases)
+        other._owners = dict(self._owners)
+        return other
+
+    # ----- alias table -----
+    def add_alias(self, spelling: str, canonical: str) -> None:
+        """Map a spelling (any form of the name) to a canonical teacher ID."""
+        canonical = intern(' '.join(canonical.split()))
+        key = teacher_key(spelling)
+        self.aliases[key] = canonical
+        self._owners.setdefault(canonical, key)
+        self._cache.clear()
+        self.dirty = True
+
+    def resolve(self, key: str, spelling: str) -> str:
+        """Canonical ID for a matching key; new keys get the usual display name,
+        or, when that display name already belongs to another teacher, their
+        fuller spelling (numbered if that is taken too). An ID once issued is
+        never changed: attendance records are kept under it."""
+        canonical = self.aliases.get(key)
+        if canonical is None:
+            canonical = display_name(spelling)
+            if self._owners.get(canonical, key) != key:
+                full = re.sub(r'\s*\d+$', '', ' '.join(spelling.split()))
+                canonical, n = full, 1
+                while self._owners.get(canonical, key) != key:
+                    n += 1
+                    canonical = f"{full} ({n})"
+            canonical = intern(canonical)
+            self.aliases[key] = canonical
+            self._owners.setdefault(canonical, key)
+            self.dirty = True
+        return canonical
+
+    # ----- raw fields -----
+    def keys(self, raw: Optional[str]) -> Tuple[Tuple[str, str], ...]:
+        """``(key, spelling)`` per distinct teacher in a raw Teachers field.
+        Pure and memoized, so it is what import worker processes use."""
+        if raw is None:
+            return ()
+        raw = str(raw)
+        cached = self._keys_cache.get(raw)
+        if cached is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            out: Dict[str, str] = {}
+            for part in TEACHER_SEPARATORS.split(raw.strip()):
+                part = part.strip()
+                key = teacher_key(part) if part else ''
+                if key and key not in out:
+                    out[intern(key)] = part
+            cached = self._keys_cache[raw] = tuple(out.items())
+        return cached
+
+    def split(self, raw: Optional[str]) -> Tuple[str, ...]:
+        """Canonical IDs of every teacher in a raw Teachers field (memoized)."""
+        if raw is None:
+            return ()
+        cached = self._cache.get(raw)
+        if cached is not None:
+            return cached
+        out: List[str] = []
+        for key, spelling in self.keys(raw):
+            canonical = self.resolve(key, spelling)
+            if canonical not in out:
+                out.append(canonical)
+        cached = self._cache[raw] = tuple(out)
+        return cached
+
+    def split_column(self, values: Iterable[Optional[str]]) -> List[Tuple[str, ...]]:
+        """Batch form of split(): each distinct value is canonicalized once."""
+        values = list(values)
+        resolved = {v: self.split(v) for v in dict.fromkeys(values)}
+        return [resolved[v] for v in values]
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,72 @@
+"""Differences between two timetable versions, computed from their slot indexes.
+
+A session is identified within a teacher by (subject, class) and within a
+class by (subject, teacher); its position is the first slot it covers. For each
+identity the start slots of both versions are matched: slots present in both
+are unchanged, the remaining ones are paired in week order as moves, and
+whatever is left over is a removed (old version only) or added (new version
+only) session.
+"""
+from __future__ import annotations
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.activity_store import ActivityTable
+from core.occupancy import HOURS_PER_DAY
+
+CHANGE_KINDS = ('moved', 'added', 'removed')
+
+
+class SessionChange(NamedTuple):
+    kind: str                           # 'teacher' or 'class'
+    entity: str                         # teacher ID or main class
+    change: str                         # 'moved', 'added' or 'removed'
+    subject: str
+    other: str                          # the class of a teacher's session, the teacher of a class's
+    old_slot: Optional[Tuple[int, int]]     # (weekday, hour) in the old version, None if added
+    new_slot: Optional[Tuple[int, int]]     # (weekday, hour) in the new version, None if removed
+
+
+def _sessions(kind: str, slots: Dict[int, List[int]], table: ActivityTable) -> Dict[Tuple[str, str], List[int]]:
+    """identity -> sorted start slots of one entity's sessions."""
+    strings = table.pool.strings
+    other_col = table.class_ if kind == 'teacher' else table.teacher
+    starts: Dict[int, int] = {}
+    for slot, rows in slots.items():
+        for row in rows:
+            if starts.get(row, slot) >= slot:
+                starts[row] = slot
+    out: Dict[Tuple[str, str], List[int]] = {}
+    for row, slot in starts.items():
+        out.setdefault((strings[table.subject[row]], strings[other_col[row]]), []).append(slot)
+    for found in out.values():
+        found.sort()
+    return out
+
+
+def _as_pair(slot: int) -> Tuple[int, int]:
+    return divmod(slot, HOURS_PER_DAY)
+
+
+def diff_entity(kind: str, entity: str, old_slots: Dict[int, List[int]], old_table: ActivityTable,
+                new_slots: Dict[int, List[int]], new_table: ActivityTable) -> List[SessionChange]:
+    """Changes of one teacher or class between two slot indexes (``slot -> rows``)."""
+    old = _sessions(kind, old_slots, old_table)
+    new = _sessions(kind, new_slots, new_table)
+    changes: List[SessionChange] = []
+    for identity in sorted(old.keys() | new.keys()):
+        before, after = old.get(identity, []), new.get(identity, [])
+        if before == after:
+            continue
+        common = Counter(before) & Counter(after)
+        gone = sorted((Counter(before) - common).elements())
+        came = sorted((Counter(after) - common).elements())
+        subject, other = identity
+        for a, b in zip(gone, came):
+            changes.append(SessionChange(kind, entity, 'moved', subject, other, _as_pair(a), _as_pair(b)))
+        for a in gone[len(came):]:
+            changes.append(SessionChange(kind, entity, 'removed', subject, other, _as_pair(a), None))
+        for b in came[len(gone):]:
+            changes.append(SessionChange(kind, entity, 'added', subject, other, None, _as_pair(b)))
+    changes.sort(key=lambda c: (c.old_slot or c.new_slot, c.subject, c.other))
+    return changes
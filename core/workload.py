@@ -0,0 +1,163 @@
+"""Weekly workload tables computed over the integer-coded activity table.
+
+One call aggregates scheduled hours per teacher, teacher x subject,
+class x subject and room. With NumPy the table columns are bulk-copied into
+arrays and summed with ``bincount``; without it the same tables are built
+with plain Python loops.
+
+Class and room hours count an activity (source file and Activity Id) once even
+when it has several teachers (one table row each); teacher hours count every
+teacher's own rows.
+"""
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from core.activity_store import NONE_INT, ActivityTable
+
+
+class Workload:
+    """Labelled hour totals. Matrices are NumPy arrays when NumPy is available,
+    lists of lists otherwise; ``rows()`` gives the same flat table either way."""
+
+    def __init__(self, teachers: List[str], subjects: List[str], classes: List[str], rooms: List[str],
+                 teacher_subject, class_subject, room_hours):
+        self.teachers = teachers
+        self.subjects = subjects
+        self.classes = classes
+        self.rooms = rooms
+        self.teacher_subject = teacher_subject      # [teacher][subject]
+        self.class_subject = class_subject          # [class][subject]
+        self.room_hours = room_hours                # [room]
+
+    @property
+    def teacher_hours(self):
+        if np is not None and isinstance(self.teacher_subject, np.ndarray):
+            return self.teacher_subject.sum(axis=1)
+        return [sum(row) for row in self.teacher_subject]
+
+    def rows(self, table: str) -> List[Tuple]:
+        """Non-zero cells as tuples: ``'teacher'`` -> (teacher, hours),
+        ``'teacher_subject'`` -> (teacher, subject, hours),
+        ``'class_subject'`` -> (class, subject, hours), ``'room'`` -> (room, hours)."""
+        if table == 'teacher':
+            return [(t, int(h)) for t, h in zip(self.teachers, self.teacher_hours) if h]
+        if table == 'room':
+            return [(r, int(h)) for r, h in zip(self.rooms, self.room_hours) if h]
+        if table == 'teacher_subject':
+            labels, matrix = self.teachers, self.teacher_subject
+        elif table == 'class_subject':
+            labels, matrix = self.classes, self.class_subject
+        else:
+            raise ValueError(f"unknown workload table: {table!r}")
+        return [(label, subject, int(h))
+                for label, row in zip(labels, matrix)
+                for subject, h in zip(self.subjects, row) if h]
+
+
+def _as_numpy(col):
+    # a copy: a live buffer view would stop the array.array from growing
+    return np.frombuffer(col, dtype=np.dtype(col.typecode)).copy() if len(col) else np.zeros(0, dtype=np.dtype(col.typecode))
+
+
+def _column(table: ActivityTable, name: str):
+    return _as_numpy(getattr(table, name))
+
+
+def compute_workload(table: ActivityTable, teacher_ids: Dict[str, Sequence[int]],
+                     class_ids: Dict[str, Sequence[int]], room_ids: Dict[str, Sequence[int]]) -> Workload:
+    """Aggregate the rows listed per teacher, class and room (the ``ids`` of
+    DataManager's views). Rows without a weekday or start hour are ignored."""
+    strings = table.pool.strings
+    teachers, classes, rooms = sorted(teacher_ids), sorted(class_ids), sorted(room_ids)
+    if np is None:
+        subjects = sorted({strings[table.subject[r]] for ids in teacher_ids.values() for r in ids})
+        return _compute_python(table, teachers, subjects, classes, rooms, teacher_ids, class_ids, room_ids)
+
+    weekday, start = _column(table, 'weekday'), _column(table, 'start_hour')
+    duration = np.maximum(_column(table, 'duration'), 1)
+    subject_codes = _column(table, 'subject')
+    live = [_as_numpy(teacher_ids[t]) for t in teachers]
+    used = np.unique(subject_codes[np.concatenate(live)]) if live else np.zeros(0, dtype=np.int64)
+    subjects = sorted(strings[c] for c in used.tolist())
+    # pool code -> subject index
+    subject_of_code = np.full(len(strings), -1, dtype=np.int64)
+    for i, s in enumerate(subjects):
+        subject_of_code[table.pool.codes[s]] = i
+    subject_idx = subject_of_code[subject_codes]
+    activity = _column(table, 'activity_id').astype(np.int64)
+    # FET numbers activities per file: (source file, Activity Id) -> one compact code
+    source = _column(table, 'source_file').astype(np.int64)
+    if len(activity):
+        _, activity_code = np.unique(source * (int(activity.max()) + 1) + activity, return_inverse=True)
+        activity_code = activity_code.reshape(-1)
+    else:
+        activity_code = activity
+    no_id_base = len(weekday)
+
+    def grouped(labels: List[str], ids_by_label: Dict[str, Sequence[int]], dedupe: bool):
+        """(label index, row) of scheduled rows, one row per activity hour if ``dedupe``."""
+        chunks = [_as_numpy(ids_by_label[k]) for k in labels]
+        if not chunks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        rows = np.concatenate(chunks).astype(np.int64)
+        label = np.repeat(np.arange(len(labels)), [len(c) for c in chunks])
+        keep = (weekday[rows] != NONE_INT) & (start[rows] != NONE_INT)
+        rows, label = rows[keep], label[keep]
+        if dedupe and len(rows):
+            # rows without an Activity Id are never merged
+            act = np.where(activity[rows] > 0, activity_code[rows], no_id_base + rows)
+            span = 2 * no_id_base
+            key = ((label * span + act) * 7 + weekday[rows]) * 24 + start[rows]
+            _, first = np.unique(key, return_index=True)
+            first.sort()
+            rows, label = rows[first], label[first]
+        return label, rows
+
+    def matrix(labels: List[str], ids_by_label: Dict[str, Sequence[int]], dedupe: bool):
+        label, rows = grouped(labels, ids_by_label, dedupe)
+        n = len(subjects)
+        flat = np.bincount(label * n + subject_idx[rows], weights=duration[rows], minlength=len(labels) * n)
+        return flat.astype(np.int64).reshape(len(labels), n)
+
+    label, rows = grouped(rooms, room_ids, True)
+    room_hours = np.bincount(label, weights=duration[rows], minlength=len(rooms)).astype(np.int64)
+    return Workload(teachers, subjects, classes, rooms, matrix(teachers, teacher_ids, False),
+                    matrix(classes, class_ids, True), room_hours)
+
+
+def _compute_python(table: ActivityTable, teachers, subjects, classes, rooms,
+                    teacher_ids, class_ids, room_ids) -> Workload:
+    strings = table.pool.strings
+    weekday, start, duration = table.weekday, table.start_hour, table.duration
+    subject_index = {s: i for i, s in enumerate(subjects)}
+
+    def scheduled(ids, dedupe: bool):
+        seen = set()
+        for r in ids:
+            if weekday[r] == NONE_INT or start[r] == NONE_INT:
+                continue
+            if dedupe:
+                code = table.activity_id[r]
+                key = ((table.source_file[r], code) if code else -r - 1, weekday[r], start[r])
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield r, max(1, duration[r])
+
+    def matrix(labels, ids_by_label, dedupe: bool):
+        out = []
+        for label in labels:
+            row = [0] * len(subjects)
+            for r, hours in scheduled(ids_by_label[label], dedupe):
+                row[subject_index[strings[table.subject[r]]]] += hours
+            out.append(row)
+        return out
+
+    room_hours = [sum(h for _r, h in scheduled(room_ids[room], True)) for room in rooms]
+    return Workload(teachers, subjects, classes, rooms, matrix(teachers, teacher_ids, False),
+                    matrix(classes, class_ids, True), room_hours)
@@ -0,0 +1,192 @@
+"""Append-only attendance journal in SQLite (WAL mode).
+
+Every attendance record is one INSERT, so a write costs the same on the first
+day of the year as on the last. Records are never updated in place; the
+Excel workbook is an export generated from the journal (see ReportManager).
+Dates are stored as day numbers (``date.toordinal()``), so a date range is a
+plain integer range in the indexes.
+"""
+from __future__ import annotations
+import datetime
+import logging
+import sqlite3
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+from report.periods import to_date
+
+logger = logging.getLogger(__name__)
+
+
+class AttendanceRecord(NamedTuple):
+    date: datetime.date     # the original text if it could not be read as a date
+    teacher: str
+    type: str
+    subject: str
+    hour: str
+    note: str = ''
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date INTEGER NOT NULL,
+    teacher TEXT NOT NULL,
+    type TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT ''
+)
+"""
+
+# report filters always pin one of these columns and range over the date
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS attendance_teacher_date ON attendance (teacher, date);
+CREATE INDEX IF NOT EXISTS attendance_subject_date ON attendance (subject, date);
+CREATE INDEX IF NOT EXISTS attendance_type_date ON attendance (type, date);
+"""
+
+# facts about the journal itself, e.g. that the old workbook was taken over
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+WORKBOOK_IMPORTED = 'workbook_imported'
+
+_COLUMNS = "date, teacher, type, subject, hour, note"
+_INSERT = f"INSERT INTO attendance ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+# PRAGMA user_version of the current layout; 0 is the first one, with ISO date
+# strings, 1 the first with day numbers (no journal_meta)
+_LAYOUT_VERSION = 2
+
+
+def _to_row(record: AttendanceRecord, undated_as_text: bool = False) -> tuple:
+    day = to_date(record.date)
+    if day is None:
+        if undated_as_text:
+            return (str(record.date if record.date is not None else ""),) + tuple(record[1:])
+        raise ValueError(f"not a date: {record.date!r}")
+    return (day.toordinal(),) + tuple(record[1:])
+
+
+def _to_record(row: tuple) -> AttendanceRecord:
+    day = row[0]
+    return AttendanceRecord(datetime.date.fromordinal(day) if isinstance(day, int) else day, *row[1:])
+
+
+class AttendanceJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        # readers (the Excel export) never block writers and vice versa;
+        # NORMAL sync is durable across application crashes in WAL mode
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            existed = self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'attendance'").fetchone()
+            layout = self._conn.execute("PRAGMA user_version").fetchone()[0] if existed else _LAYOUT_VERSION
+            if layout < 1:
+                self._migrate_dates()
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_META_SCHEMA)
+            if layout < 2 and len(self):
+                # earlier layouts took the workbook over before their first record
+                self._set_meta(WORKBOOK_IMPORTED, '')
+            self._conn.execute(f"PRAGMA user_version = {_LAYOUT_VERSION}")
+        self._conn.executescript(_INDEXES)
+
+    def _migrate_dates(self) -> None:
+        """Copy a first-layout journal (TEXT dates) into the current table,
+        dates as day numbers; a date that cannot be read keeps its text."""
+        self._conn.execute("ALTER TABLE attendance RENAME TO attendance_v0")
+        self._conn.execute(_SCHEMA)
+        rows = []
+        for row_id, text, *rest in self._conn.execute(f"SELECT id, {_COLUMNS} FROM attendance_v0 ORDER BY id"):
+            day = to_date(text)
+            if day is None:
+                logger.warning("تاريخ غير صالح في سجل المتابعة (%d): %r", row_id, text)
+            rows.append((row_id, day.toordinal() if day is not None else text, *rest))
+        self._conn.executemany(f"INSERT INTO attendance (id, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._conn.execute("DROP TABLE attendance_v0")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+
+    def append(self, record: AttendanceRecord) -> None:
+        with self._conn:
+            self._conn.execute(_INSERT, _to_row(record))
+
+    def extend(self, records: Iterable[AttendanceRecord]) -> int:
+        """Append many records in one transaction; all or none are written."""
+        rows = (_to_row(record) for record in records)
+        with self._conn:
+            return self._conn.executemany(_INSERT, rows).rowcount
+
+    def import_records(self, records: Iterable[AttendanceRecord], source: str) -> int:
+        """Append the records of the workbook ``source`` and note that it was
+        imported, in one transaction: a failed import leaves neither.
+        Records whose date cannot be read keep the date's text, as the date
+        migration does."""
+        rows = (_to_row(record, True) for record in records)
+        with self._conn:
+            count = self._conn.executemany(_INSERT, rows).rowcount
+            self._set_meta(WORKBOOK_IMPORTED, source)
+        return count
+
+    def mark_workbook_imported(self, source: str = '') -> None:
+        """Note that there is no workbook history left to take over."""
+        with self._conn:
+            self._set_meta(WORKBOOK_IMPORTED, source)
+
+    @property
+    def workbook_imported(self) -> bool:
+        return self.get_meta(WORKBOOK_IMPORTED) is not None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM journal_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO journal_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def records(self) -> Iterator[AttendanceRecord]:
+        """Every record in the order it was written, undated ones included."""
+        for row in self._conn.execute(f"SELECT {_COLUMNS} FROM attendance ORDER BY id"):
+            yield _to_record(row)
+
+    def query(self, teacher: Optional[str] = None, subject: Optional[str] = None, type: Optional[str] = None,
+              start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None
+              ) -> Iterator[AttendanceRecord]:
+        """Records matching every given filter, by date then write order. Dates
+        are inclusive bounds; with a teacher, subject or type the lookup is a
+        range scan of the matching (column, date) index."""
+        sql, params = self._where(teacher, subject, type, start_date, end_date)
+        for row in self._conn.execute(f"SELECT {_COLUMNS} FROM attendance{sql} ORDER BY date, id", params):
+            yield _to_record(row)
+
+    def query_plan(self, **filters) -> List[str]:
+        """SQLite's plan for ``query(**filters)``, to check which index it uses."""
+        sql, params = self._where(**filters)
+        return [row[-1] for row in self._conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT {_COLUMNS} FROM attendance{sql} ORDER BY date, id", params)]
+
+    @staticmethod
+    def _where(teacher=None, subject=None, type=None, start_date=None, end_date=None) -> Tuple[str, list]:
+        clauses, params, index = [], [], ""
+        # a pinned teacher (else subject, else type) picks the index, whatever SQLite would guess
+        for column, value in (('teacher', teacher), ('subject', subject), ('type', type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+                index = index or f" INDEXED BY attendance_{column}_date"
+        # always both bounds: rows a migration could not date keep their text,
+        # which SQLite sorts after every number
+        clauses.append("date BETWEEN ? AND ?")
+        params.append((start_date or datetime.date.min).toordinal())
+        params.append((end_date or datetime.date.max).toordinal())
+        return index + " WHERE " + " AND ".join(clauses), params
+
+    def close(self) -> None:
+        self._conn.close()
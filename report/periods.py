@@ -0,0 +1,58 @@
+"""Report periods resolved to typed ``(start_date, end_date)`` ranges.
+
+Ranges are inclusive on both ends. The school week runs from Sunday to
+Saturday, as in the timetable (see ``GRID_DAYS_ORDER``).
+"""
+from __future__ import annotations
+import datetime
+from typing import Optional, Tuple
+
+DateRange = Tuple[datetime.date, datetime.date]
+
+PERIOD_DAY = "اليوم"
+PERIOD_WEEK = "الأسبوع الحالي"
+PERIOD_MONTH = "الشهر الحالي"
+PERIOD_YEAR = "السنة الحالية"
+PERIOD_CUSTOM = "فترة مخصصة"
+PERIODS = [PERIOD_DAY, PERIOD_WEEK, PERIOD_MONTH, PERIOD_YEAR, PERIOD_CUSTOM]
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+def to_date(value) -> Optional[datetime.date]:
+    """A date from a date, a datetime or a date string; None if it is not one."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        for fmt in _DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def period_range(period: str, today: Optional[datetime.date] = None,
+                 start: Optional[datetime.date] = None, end: Optional[datetime.date] = None) -> DateRange:
+    """The dates a report period covers. ``start``/``end`` are used for
+    ``PERIOD_CUSTOM`` (and swapped if given in the wrong order)."""
+    today = today or datetime.date.today()
+    if period == PERIOD_DAY:
+        return today, today
+    if period == PERIOD_WEEK:
+        sunday = today - datetime.timedelta(days=(today.weekday() + 1) % 7)
+        return sunday, sunday + datetime.timedelta(days=6)
+    if period == PERIOD_MONTH:
+        first = today.replace(day=1)
+        following = (first + datetime.timedelta(days=32)).replace(day=1)
+        return first, following - datetime.timedelta(days=1)
+    if period == PERIOD_YEAR:
+        return today.replace(month=1, day=1), today.replace(month=12, day=31)
+    if period == PERIOD_CUSTOM:
+        if start is None or end is None:
+            raise ValueError("a custom period needs a start and an end date")
+        return (start, end) if start <= end else (end, start)
+    raise ValueError(f"unknown report period: {period!r}")
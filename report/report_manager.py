@@ -1,11 +1,17 @@
-"""ReportManager: handling Excel append and PDF generation (best-effort).
+"""ReportManager: attendance journal, Excel export and PDF generation (best-effort).
+Attendance records are appended to a SQLite journal; the Excel workbook is
+exported from it on demand and in the background after writes.
 Uses openpyxl and reportlab if available.
 """
 from __future__ import annotations
 import datetime
 import os
 import logging
-from typing import Optional
+import threading
+from typing import Iterable, Iterator, List, Optional, Union
+
+from report.attendance_journal import AttendanceJournal, AttendanceRecord
+from report.periods import DateRange, to_date
 
 try:
     import openpyxl
@@ -21,48 +27,169 @@ except Exception:
 logger = logging.getLogger(__name__)
 
 EXCEL_FILE = "متابعة_الأساتذة.xlsx"
+JOURNAL_FILE = "متابعة_الأساتذة.db"
 REPORTS_DIR = "تقارير_الأساتذة"
-
-os.makedirs(REPORTS_DIR, exist_ok=True)
+SHEET_TITLE = "المتابعة"
+HEADER = ["التاريخ", "الأستاذ", "النوع", "المادة", "الساعة", "الملاحظة"]
+# seconds of quiet after the last write before the workbook is re-exported
+EXPORT_DELAY = 5.0
 
 
 class ReportManager:
-    def __init__(self, excel_path: str = EXCEL_FILE):
+    def __init__(self, excel_path: str = EXCEL_FILE, journal_path: str = JOURNAL_FILE,
+                 export_delay: Optional[float] = EXPORT_DELAY):
         self.excel_path = excel_path
-        if openpyxl and not os.path.exists(self.excel_path):
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "المتابعة"
-            ws.append(["التاريخ", "الأستاذ", "النوع", "المادة", "الساعة", "الملاحظة"])
-            wb.save(self.excel_path)
-
-    def append_row_to_excel(self, date_str: str, prof: str, type_str: str, matiere: str, hour_str: str, note: str = "") -> bool:
-        if not openpyxl:
-            logger.error("openpyxl غير مثبت")
-            return False
+        self.export_delay = export_delay
+        self._export_timer: Optional[threading.Timer] = None
+        self._export_lock = threading.Lock()
+        self._export_pending = False
+        self.journal = AttendanceJournal(journal_path)
+        if not self.journal.workbook_imported:
+            # first start after the switch from the workbook: take its history over.
+            # Until that succeeds the workbook is never overwritten by an export
+            if not os.path.exists(self.excel_path):
+                self.journal.mark_workbook_imported()
+            else:
+                try:
+                    count = self.import_workbook(self.excel_path)
+                    logger.info("تم نقل %d سجل من %s إلى سجل المتابعة", count, self.excel_path)
+                except Exception as e:
+                    logger.exception("تعذر نقل السجلات من %s: %s", self.excel_path, e)
+
+    def append_row(self, date_str: Union[str, datetime.date], prof: str, type_str: str, matiere: str,
+                   hour_str: str, note: str = "") -> bool:
+        """Append one attendance record to the journal; ``date_str`` may be a
+        date or a date string such as ``2025-10-26``."""
         try:
-            wb = openpyxl.load_workbook(self.excel_path)
-            ws = wb.active
-            ws.append([date_str, prof, type_str, matiere, hour_str, note])
-            wb.save(self.excel_path)
+            self.journal.append(AttendanceRecord(date_str, prof, type_str, matiere, hour_str, note or ""))
+        except Exception as e:
+            logger.exception("خطأ أثناء حفظ المتابعة: %s", e)
+            return False
+        self.schedule_export()
+        return True
+
+    # the name callers used when every record went straight into the workbook
+    append_row_to_excel = append_row
+
+    def append_rows(self, records: Iterable[AttendanceRecord]) -> bool:
+        """Append several records, e.g. every absent hour of a day across
+        teachers, in one transaction: either all are saved or none."""
+        records = [rec._replace(note=rec.note or "") for rec in (AttendanceRecord(*r) for r in records)]
+        if not records:
             return True
+        try:
+            self.journal.extend(records)
         except Exception as e:
-            logger.exception("خطأ أثناء الكتابة في Excel: %s", e)
+            logger.exception("خطأ أثناء حفظ المتابعة: %s", e)
+            return False
+        self.schedule_export()
+        return True
+
+    def import_workbook(self, path: str) -> int:
+        """Append the rows of an attendance workbook (the layout export_excel
+        writes) to the journal, all or none, and note that the workbook was
+        taken over. Returns the number of records imported."""
+        if not openpyxl:
+            logger.error("openpyxl غير مثبت")
+            return 0
+        wb = openpyxl.load_workbook(path, read_only=True)
+        try:
+            return self.journal.import_records(self._workbook_records(wb, path), path)
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _workbook_records(wb, path: str) -> Iterator[AttendanceRecord]:
+        for row in wb.active.iter_rows(min_row=2, values_only=True):
+            row = (tuple(row) + (None,) * 6)[:6]
+            if not any(v is not None and v != "" for v in row):
+                continue
+            date, prof, ttype, matiere, hour, note = row
+            day = to_date(date)
+            if day is None:
+                # kept with the date's text, so the next export still has the row
+                logger.warning("سطر بتاريخ غير صالح في %s: %r", path, row)
+                day = date
+            yield AttendanceRecord(day, *(str(v) if v is not None else "" for v in
+                                          (prof, ttype, matiere, hour, note)))
+
+    def export_excel(self, path: Optional[str] = None) -> bool:
+        """Write the whole journal to an attendance workbook (``excel_path`` by default)."""
+        if not openpyxl:
+            logger.error("openpyxl غير مثبت")
             return False
+        path = path or self.excel_path
+        tmp = path + ".tmp"
+        with self._export_lock:
+            self._export_pending = False
+            # a connection of our own: this may run on the export thread
+            journal = AttendanceJournal(self.journal.path)
+            try:
+                if not journal.workbook_imported and os.path.abspath(path) == os.path.abspath(self.excel_path):
+                    # its history is not in the journal yet
+                    logger.error("لم يتم نقل سجلات %s بعد؛ لن يتم استبداله", path)
+                    return False
+                wb = openpyxl.Workbook(write_only=True)
+                ws = wb.create_sheet(SHEET_TITLE)
+                ws.append(HEADER)
+                for record in journal.records():
+                    ws.append(list(record))
+                wb.save(tmp)
+                os.replace(tmp, path)
+                return True
+            except Exception as e:
+                logger.exception("خطأ أثناء تصدير ملف Excel: %s", e)
+                return False
+            finally:
+                journal.close()
 
-    def generate_pdf_for_prof(self, prof: str, periode: str, matiere: Optional[str] = None, date_filter: Optional[str] = None) -> Optional[str]:
+    def schedule_export(self) -> None:
+        """Re-export the workbook in the background once writes pause for
+        ``export_delay`` seconds (never if ``export_delay`` is None, nor while
+        the old workbook's history has not been imported)."""
+        if self.export_delay is None or not openpyxl or not self.journal.workbook_imported:
+            return
+        self._export_pending = True
+        if self._export_timer is not None:
+            self._export_timer.cancel()
+        self._export_timer = threading.Timer(self.export_delay, self.export_excel)
+        self._export_timer.daemon = True
+        self._export_timer.start()
+
+    def close(self) -> None:
+        """Finish a pending background export and close the journal."""
+        timer, self._export_timer = self._export_timer, None
+        if timer is not None:
+            timer.cancel()
+            timer.join()
+        if self._export_pending:
+            self.export_excel()
+        self.journal.close()
+
+    def query(self, teacher: Optional[str] = None, subject: Optional[str] = None, type_str: Optional[str] = None,
+              date_range: Optional[DateRange] = None) -> List[AttendanceRecord]:
+        """Attendance records matching every given filter, by date; the filters,
+        ``date_range`` (inclusive ``(start_date, end_date)``) included, run as
+        index range scans in the journal."""
+        start, end = date_range if date_range is not None else (None, None)
+        return list(self.journal.query(teacher, subject, type_str, start, end))
+
+    def generate_pdf_for_prof(self, prof: str, periode: str, matiere: Optional[str] = None,
+                              date_filter: Optional[str] = None,
+                              date_range: Optional[DateRange] = None) -> Optional[str]:
+        """PDF of a teacher's records in ``date_range`` (see report.periods);
+        ``date_filter`` is a single day, the older way to ask for one."""
+        if date_range is None and date_filter:
+            day = to_date(date_filter)
+            if day is None:
+                logger.error("تاريخ غير صالح للتقرير: %r", date_filter)
+                return None
+            date_range = (day, day)
         if canvas is None:
             logger.warning("reportlab غير مثبت؛ لا يمكن توليد PDF")
             return None
-        # best-effort: read excel and filter rows
-        try:
-            import openpyxl as _op
-            wb = _op.load_workbook(self.excel_path)
-            ws = wb.active
-        except Exception:
-            logger.exception("خطأ أثناء فتح ملف Excel")
-            return None
         today = datetime.date.today()
+        os.makedirs(REPORTS_DIR, exist_ok=True)
         filename = os.path.join(REPORTS_DIR, f"{prof}_{periode}.pdf")
         c = canvas.Canvas(filename, pagesize=A4)
         c.setFont("Helvetica-Bold", 14)
@@ -71,12 +198,10 @@ class ReportManager:
         c.drawString(50, 790, f"المادة: {matiere if matiere else 'جميع المواد'}")
         c.drawString(50, 775, f"تاريخ الطباعة: {today.strftime('%Y-%m-%d')}")
         y = 750
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            date, row_prof, ttype, row_matiere, hour, note = row
-            if row_prof != prof:
-                continue
-            if date_filter and date != date_filter:
-                continue
+        if date_range is not None:
+            c.drawString(50, 760, f"من {date_range[0].isoformat()} إلى {date_range[1].isoformat()}")
+        records = self.query(teacher=prof, subject=matiere, date_range=date_range)
+        for date, _prof, ttype, row_matiere, hour, note in records:
             text = f"{date} | {ttype} | {row_matiere} | {hour} | {note or ''}"
             c.drawString(50, y, text[:120])
             y -= 12
@@ -1,15 +1,19 @@
 """Entry point to start the refactored app."""
 from __future__ import annotations
+import multiprocessing
 import tkinter as tk
 from utils.helpers import setup_logging
 from core.data_manager import DataManager
+from core.snapshot import SNAPSHOT_FILE
+from core.teacher_names import TEACHER_ALIASES_FILE
 from report.report_manager import ReportManager
 from ui.main_ui import UIManager
 
 
 def main():
     setup_logging(None)
-    dm = DataManager()
+    dm = DataManager(snapshot_path=SNAPSHOT_FILE, aliases_path=TEACHER_ALIASES_FILE)
+    dm.load_snapshot()
     rm = ReportManager()
     root = tk.Tk()
     root.title('ناظر المدرسة - Suivi des enseignants')
@@ -26,7 +30,11 @@ def main():
     ui = UIManager(root, dm, rm)
     ui.build_main_ui()
     root.mainloop()
+    # writes the workbook export if attendance changed since the last one
+    rm.close()
 
 if __name__ == '__main__':
+    # the importer may use a process pool; needed for the frozen Windows build
+    multiprocessing.freeze_support()
     main()
 
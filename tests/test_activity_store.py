@@ -0,0 +1,48 @@
+"""Tests for the columnar activity store and its dict-shaped records."""
+import pickle
+import sys
+
+import pytest
+
+from core.activity_store import ActivityRecord, ActivityTable, ClassActivityRecord, ACTIVITY_FIELDS
+
+
+def _table():
+    t = ActivityTable()
+    t.append(0, 8, 2, 'Math', 'S1', '4M1_G1', '7', 'a.csv', '1', 'الاثنين ص', 'morning', 'Ali Ahmed')
+    t.append(None, None, 1, 'Math', '', '', None, 'a.csv', '', '', None, 'Sara Amine')
+    return t
+
+
+def test_record_behaves_like_activity_dict():
+    t = _table()
+    rec = ActivityRecord(t, 0)
+    assert list(rec) == list(ACTIVITY_FIELDS)
+    assert rec['class'] == '4M1_G1' and rec.get('teacher') is None
+    assert rec == {'weekday': 0, 'start_hour': 8, 'duration': 2, 'subject': 'Math', 'room': 'S1',
+                   'class': '4M1_G1', 'activity_id': '7', 'source_file': 'a.csv',
+                   'original_hour_field': '1', 'original_day_field': 'الاثنين ص', 'period': 'morning'}
+    empty = ActivityRecord(t, 1)
+    assert empty['weekday'] is None and empty['activity_id'] is None and empty['period'] is None
+    # repeated strings are stored once
+    assert t.subject[0] == t.subject[1] and len(t.pool) == 12
+
+
+def test_class_view_shares_the_row():
+    t = _table()
+    rec, class_rec = ActivityRecord(t, 0), ClassActivityRecord(t, 0)
+    assert class_rec['teacher'] == 'Ali Ahmed' and class_rec['original_class'] == '4M1_G1'
+    t.set(0, 'room', 'S9')
+    assert rec['room'] == class_rec['room'] == 'S9'
+    with pytest.raises(TypeError, match='update_activity'):
+        rec['room'] = 'S8'
+    detached = rec.copy()
+    detached['room'] = 'S1'
+    assert rec['room'] == 'S9'
+
+
+def test_table_pickles_compactly():
+    t = _table()
+    restored = pickle.loads(pickle.dumps(t))
+    assert ActivityRecord(restored, 0) == ActivityRecord(t, 0)
+    assert restored.pool.strings[restored.subject[0]] is sys.intern('Math')
@@ -1,5 +1,5 @@
-"""Simple smoke test for importer. Run with pytest after saving a sample CSV file."""
-from core.data_manager import DataManager
+"""Tests for the FET CSV importer and the DataManager indexes and queries built on it."""
+from core.data_manager import DataManager, FieldDecoder
 import tempfile
 
 SAMPLE_CSV = '''Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets
@@ -17,4 +17,421 @@ def test_import_sample(tmp_path):
     assert 'Math' in dm.materials_teachers
     assert 'Ali Ahmed' in dm.timetable_data
 
+
+def test_header_aliases_resolved_once(tmp_path):
+    p = tmp_path / "fr.csv"
+    p.write_text("Jour;Heure;Matière;Enseignants;Salle;Classe;Durée\n"
+                 "الاثنين;1;Math;Ali Ahmed;101;4M1;2\n"
+                 "الثلاثاء;2;Physics;Mohamed Salah;102\n", encoding='utf-8')
+    dm = DataManager()
+    assert dm.import_fet_activities_csv_files([str(p)])
+    ali = dm.timetable_data['Ali Ahmed'][0]
+    assert (ali['weekday'], ali['start_hour'], ali['duration'], ali['room']) == (0, 8, 2, '101')
+    # short row: missing trailing columns read as empty
+    assert dm.timetable_data['Mohamed Salah'][0]['class'] == ''
+
+
+def test_parallel_import_matches_sequential(tmp_path):
+    paths = []
+    for i, (subject, teacher) in enumerate([("Math", "Ali Ahmed"), ("Zoology", "Ali Ahmed"), ("Art", "Sara Amine")]):
+        p = tmp_path / f"p{i}.csv"
+        p.write_text(SAMPLE_CSV + f"{i + 3},الخميس,3,{subject},{teacher},10{i},4M{i + 1}_G1\n", encoding='utf-8')
+        paths.append(str(p))
+    seq, par = DataManager(), DataManager()
+    seq.import_fet_activities_csv_files(paths, workers=1)
+    par.import_fet_activities_csv_files(paths, workers=2)
+    for name in ('materials_teachers', 'materials_colors', 'teachers_subjects', 'teachers_classes',
+                 'classes_teachers', 'timetable_data', 'classes_timetable'):
+        assert getattr(par, name) == getattr(seq, name)
+        assert list(getattr(par, name)) == list(getattr(seq, name))
+
+
+def test_reimport_only_reparses_changed_files(tmp_path):
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    a.write_text(SAMPLE_CSV, encoding='utf-8')
+    b.write_text(SAMPLE_CSV + "3,الخميس,3,Art,Sara Amine,103,4M3\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(a), str(b)])
+    kept = dm._parsed_files[str(a)]
+
+    b.write_text(SAMPLE_CSV.replace("Physics", "Chemistry"), encoding='utf-8')
+    dm.import_fet_activities_csv_files([str(a), str(b)])
+    assert dm._parsed_files[str(a)] is kept
+    assert 'Sara Amine' not in dm.timetable_data and 'Art' not in dm.materials_colors
+
+    fresh = DataManager()
+    fresh.import_fet_activities_csv_files([str(a), str(b)])
+    for name in ('materials_teachers', 'materials_colors', 'teachers_subjects', 'teachers_classes',
+                 'classes_teachers', 'timetable_data', 'classes_timetable'):
+        assert getattr(dm, name) == getattr(fresh, name)
+
+    dm.import_fet_activities_csv_files([str(b)])
+    assert [s['subject'] for s in dm.timetable_data['Mohamed Salah']] == ['Chemistry']
+
+
+def test_reimport_patches_slots_like_a_full_import(tmp_path):
+    a, b, c = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"
+    a.write_text(SAMPLE_CSV, encoding='utf-8')
+    b.write_text(SAMPLE_CSV.replace("Physics", "Art") + "5,الاثنين,1,Sport,Ali Ahmed,101,4M1\n",
+                 encoding='utf-8')
+    c.write_text(SAMPLE_CSV + "6,الخميس,2,Art,Omar Ali,101,4M2\n", encoding='utf-8')
+    paths = [str(a), str(b), str(c)]
+    dm = DataManager()
+    dm.import_fet_activities_csv_files(paths)
+    # the first file now clashes with rows of the files after it
+    a.write_text(SAMPLE_CSV.replace("2,الثلاثاء,2", "2,الخميس,2") + "7,الاثنين,1,Art,Omar Ali,101,4M1_G1\n",
+                 encoding='utf-8')
+    dm.import_fet_activities_csv_files(paths)
+    fresh = DataManager()
+    fresh.import_fet_activities_csv_files(paths)
+
+    def content(d):
+        table = d.activities
+        label = lambda row: (table.get(row, 'source_file'), table.get(row, 'activity_id'), table.get(row, 'teacher'))
+        slots = {kind: {key: {slot: [label(r) for r in rows] for slot, rows in by_slot.items()}
+                        for key, by_slot in d._slot_index(kind)[0].items()} for kind in ('teacher', 'class', 'room')}
+        found = {slot: [(c.kind, c.entity, [label(r) for r in c.rows]) for c in conflicts]
+                 for slot, conflicts in d.conflicts_by_slot().items()}
+        days = {t: [[(h, label(r)) for h, r in day] for day in by_day] for t, by_day in d.teacher_days.items()}
+        return slots, found, days, d.teacher_busy, d.class_busy, d.room_busy
+
+    assert dm._dead_rows and dm.conflicts_by_slot() and content(dm) == content(fresh)
+
+
+def test_snapshot_roundtrip_and_staleness(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV, encoding='utf-8')
+    snap = str(tmp_path / "snap.bin")
+    dm = DataManager(snapshot_path=snap)
+    dm.import_fet_activities_csv_files([str(p)])
+
+    restored = DataManager(snapshot_path=snap)
+    assert restored.load_snapshot()
+    assert restored.timetable_data == dm.timetable_data
+    assert restored.materials_colors == dm.materials_colors
+    # incremental state survives: re-import without changes reuses the snapshot's parse
+    kept = restored._parsed_files[str(p)]
+    restored.import_fet_activities_csv_files([str(p)])
+    assert restored._parsed_files[str(p)] is kept
+
+    p.write_text(SAMPLE_CSV.replace("Math", "Chemistry"), encoding='utf-8')
+    assert not DataManager(snapshot_path=snap).load_snapshot()
+
+    with open(snap, 'r+b') as f:
+        f.seek(-1, 2)
+        f.write(b'\x00')
+    assert not DataManager(snapshot_path=snap).load_snapshot()
+
+
+def test_teacher_and_class_views_share_rows(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV, encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    session = dm.timetable_data['Ali Ahmed'][0]
+    assert dm.classes_timetable['4M1'][0].row == session.row
+    assert len(dm.activities) == 2
+
+    dm.update_activity(session.row, room='S7', start_hour=9)
+    assert dm.classes_timetable['4M1'][0]['room'] == 'S7'
+    assert dm.timetable_data['Ali Ahmed'][0]['start_hour'] == 9
+
+
+def test_replaced_files_are_compacted(tmp_path):
+    p = tmp_path / "sample.csv"
+    dm = DataManager()
+    for subject in ("Math", "Chemistry", "Biology"):
+        p.write_text(SAMPLE_CSV.replace("Math", subject), encoding='utf-8')
+        dm.import_fet_activities_csv_files([str(p)], force=True)
+    assert len(dm.activities) <= 4
+    assert [s['subject'] for s in dm.timetable_data['Ali Ahmed']] == ['Biology']
+    assert dm.classes_timetable['4M2'][0]['teacher'] == 'Mohamed Salah'
+
+
+def test_field_decoder_memoizes_fet_labels():
+    dec = FieldDecoder()
+    assert dec.decode("02 الأحد م", "3") == (6, 'afternoon', 16)
+    assert dec.decode("09 الخميس ص", "1") == (3, 'morning', 8)
+    assert dec.decode("02 الأحد م", "3") == (6, 'afternoon', 16)
+    assert (dec.hits, dec.misses) == (1, 2)
+    assert dec.decode("", "x") == (None, None, None)
+
+
+def test_teacher_spellings_are_merged(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV + "3,الخميس,3,Math,Ali Ahmed2,101,4M1\n", encoding='utf-8')
+    aliases = str(tmp_path / "aliases.json")
+    dm = DataManager(aliases_path=aliases)
+    dm.import_fet_activities_csv_files([str(p)])
+    assert len(dm.timetable_data['Ali Ahmed']) == 2
+
+    dm.add_teacher_alias('Mohamed Salah', 'M. Salah')
+    assert 'M. Salah' in dm.timetable_data and 'Mohamed Salah' not in dm.timetable_data
+    assert dm.classes_teachers['4M2'] == ['M. Salah']
+    assert DataManager(aliases_path=aliases).teacher_names.split('Mohamed Salah') == ('M. Salah',)
+
+
+def test_namesake_does_not_rename_an_issued_id(tmp_path):
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    a.write_text(SAMPLE_CSV.replace("Ali Ahmed", "Ali Ahmed Math"), encoding='utf-8')
+    b.write_text(SAMPLE_CSV.replace("Ali Ahmed", "Ali Ahmed Art").replace("1,الاثنين,1", "3,الخميس,1"),
+                 encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(a)])
+    dm.import_fet_activities_csv_files([str(a), str(b)])
+    assert sorted(dm.timetable_data) == ['Ali Ahmed', 'Ali Ahmed Art', 'Mohamed Salah']
+    assert dm.classes_teachers['4M1'] == ['Ali Ahmed', 'Ali Ahmed Art']
+
+
+def test_iter_activities_streams_typed_records(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV + "3,Someday,x,Math,Ali Ahmed,101,4M1_G1\n", encoding='utf-8')
+    dm = DataManager()
+    stream = dm.iter_activities([str(p), str(tmp_path / "missing.csv")])
+    first = next(stream)
+    assert (first.teacher, first.weekday, first.start_hour, first.subject, first.main_class) == \
+        ('Ali Ahmed', 0, 8, 'Math', '4M1')
+    rest = list(stream)
+    assert rest[-1].weekday is None and rest[-1].class_ == '4M1_G1' and rest[-1].main_class == '4M1'
+    assert dm.timetable_data == {}
+    # streaming does not add to the alias table
+    assert dm.teacher_names.aliases == {} and not dm.teacher_names.dirty
+
+    dm.import_fet_activities_csv_files([str(p)])
+    assert sum(len(v) for v in dm.timetable_data.values()) == 1 + len(rest)
+    archive = tmp_path / "archive.csv"
+    archive.write_text(SAMPLE_CSV.replace("Ali Ahmed", "Ali Ahmed Math"), encoding='utf-8')
+    aliases = dict(dm.teacher_names.aliases)
+    assert next(dm.iter_activities([str(archive)])).teacher == 'Ali Ahmed Math'
+    assert dm.teacher_names.aliases == aliases
+
+
+def test_import_report_lists_rejected_rows(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV + "3,Someday,1,Math,Ali Ahmed,101,4M1\n4,الخميس,2,Math,,101,4M1\n",
+                 encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    report = dm.last_import_report
+    assert report.rows == 4 and report.activities == 3
+    assert [(r.row_num, r.reason) for r in report.rejected] == [(3, 'bad_day'), (4, 'no_teacher')]
+    assert set(report.stage_seconds) == {'read', 'decode', 'normalize', 'index', 'finalize'}
+    assert report.rows_per_sec > 0 and 'Someday' in report.summary()
+
+    dm.import_fet_activities_csv_files([str(p)])
+    assert dm.last_import_report.reparsed == [] and len(dm.last_import_report.rejected) == 2
+
+
+def test_slot_index_and_grids(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text('Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets,Duration\n'
+                 '1,الأحد,1,Math,Ali Ahmed,101,4M1,2\n'
+                 '2,الاثنين,5,Physics,Ali Ahmed,102,4M2_G1,1\n', encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    assert [a['subject'] for a in dm.activities_at('Ali Ahmed', 6, 9)] == ['Math']
+    assert [a['teacher'] for a in dm.activities_at('4M1', 6, 8, kind='class')] == ['Ali Ahmed']
+
+    grid = dm.build_teacher_grid('Ali Ahmed')
+    assert grid[0] == ["الساعة / اليوم", "الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس"]
+    assert [row[0] for row in grid[1:]][4] == "—" and len(grid) == 10
+    assert grid[1][1] == grid[2][1] == "Math\n[4M1] (101)"
+    assert grid[6][2] == "Physics\n[4M2_G1] (102)"
+    assert dm.build_class_grid('4M1')[1][1] == "Math\nAli Ahmed\n(101)"
+
+    row = dm.timetable_data['Ali Ahmed'][0].row
+    dm.update_activity(row, weekday=3, duration=1)
+    assert dm.activities_at('4M1', 6, 8, kind='class') == []
+    assert dm.build_class_grid('4M1')[1][5] == "Math\nAli Ahmed\n(101)" and dm.build_class_grid('4M1')[2][5] == ""
+
+
+def test_occupancy_bitsets(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV + "3,الاثنين,2,Math,Ali Ahmed,101,4M1\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    assert not dm.is_room_free('101', 0, 8) and dm.is_room_free('101', 1, 9)
+    assert dm.overlap_slots('4M1', 'class', 'Ali Ahmed', 'teacher') == [(0, 8), (0, 9)]
+    free = dm.common_free_slots(['Ali Ahmed', 'Mohamed Salah'])
+    assert (0, 8) not in free and (1, 9) not in free and (1, 10) in free and len(free) == 5 * 8 - 3
+
+    row = dm.timetable_data['Ali Ahmed'][1].row
+    dm.update_activity(row, room='S1', start_hour=10)
+    assert dm.is_room_free('101', 0, 9) and not dm.is_room_free('S1', 0, 10)
+    assert [a['subject'] for a in dm.rooms_timetable['S1']] == ['Math']
+    assert dm.overlap_slots('4M1', 'class', 'Ali Ahmed', 'teacher') == [(0, 8), (0, 10)]
+    # a late Sunday session does not spill past the end of the week
+    dm.update_activity(row, weekday=6, start_hour=23, duration=3)
+    assert max(dm.room_slots['S1']) == 6 * 24 + 23 and dm.room_busy['S1'].bit_length() == 7 * 24
+
+
+def test_conflicts_detected_on_import(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV +
+                 "3,الاثنين,1,Physics,Ali Ahmed,102,4M2\n"        # teacher twice, and room 101 free
+                 "4,الثلاثاء,2,Math,Omar Ali,102,4M3\n"           # room 102 twice
+                 "5,الأربعاء,1,TP,Ali Ahmed,L1,4M1_G1\n"
+                 "6,الأربعاء,1,TP,Omar Ali,L2,4M1_G2\n"          # parallel groups: fine
+                 "7,الأربعاء,1,Math,Mohamed Salah,103,4M1\n"     # whole class over both groups
+                 "8,الخميس,1,Math,Ali Ahmed + Omar Ali,104,4M4\n",  # one activity, two teachers
+                 encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    found = dm.conflicts_by_slot()
+    assert list(found) == [(0, 8), (1, 9), (2, 8)]
+    assert [(c.kind, c.entity) for c in found[(0, 8)]] == [('teacher', 'Ali Ahmed')]
+    assert [(c.kind, c.entity) for c in found[(1, 9)]] == [('room', '102')]
+    assert [(c.kind, c.entity, len(c.rows)) for c in found[(2, 8)]] == [('class', '4M1', 3)]
+    assert dm.last_import_report.conflicts == 3
+
+    row = found[(0, 8)][0].rows[1]
+    dm.update_activity(row, start_hour=10)
+    assert (0, 8) not in dm.conflicts_by_slot()
+
+
+def test_same_activity_id_in_two_files_still_conflicts(tmp_path):
+    header = "Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets\n"
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    a.write_text(header + "1,الاثنين,1,Math,Ali Ahmed,101,4M1\n", encoding='utf-8')
+    b.write_text(header + "1,الاثنين,1,Physics,Ali Ahmed,102,4M2\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(a), str(b)])
+    assert dm.teacher_slots == {'Ali Ahmed': {8: [0, 1]}}
+    assert [(c.kind, c.entity, c.rows) for c in dm.conflicts_by_slot()[(0, 8)]] == [('teacher', 'Ali Ahmed', (0, 1))]
+
+
+def test_sessions_for_range(tmp_path):
+    from datetime import date
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV + "3,الاثنين,2,Math,Ali Ahmed,101,4M1\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    monday = date(2026, 10, 12)
+    assert [s['start_hour'] for s in dm.sessions_for_prof_on_date('Ali Ahmed', monday)] == [8, 9]
+    assert dm.sessions_for_prof_on_date('Nobody', monday) is None
+
+    got = [(d.day, h, s['teacher'], s['subject'])
+           for d, h, s in dm.sessions_for_range(['Mohamed Salah', 'Ali Ahmed'], monday, date(2026, 10, 20))]
+    assert got == [(12, 8, 'Ali Ahmed', 'Math'), (12, 9, 'Ali Ahmed', 'Math'),
+                   (13, 9, 'Mohamed Salah', 'Physics'),
+                   (19, 8, 'Ali Ahmed', 'Math'), (19, 9, 'Ali Ahmed', 'Math'),
+                   (20, 9, 'Mohamed Salah', 'Physics')]
+
+
+def test_find_substitutes_ranking(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV +
+                 "3,الاثنين,1,Physics,Omar Ali,102,4M2\n"
+                 "4,الاثنين,2,Math,Omar Ali,101,4M3\n"
+                 "5,الاثنين,3,Math,Sara Ben,101,4M3\n"
+                 "6,الاثنين,4,Math,Sara Ben,101,4M1\n"
+                 "7,الاثنين,4,Math,Sara Ben,101,4M1\n"
+                 "8,الثلاثاء,1,Math,Nadia K,101,4M3\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    got = dm.find_substitutes(0, 8, subject='Math', class_name='4M1_G1', exclude=['Ali Ahmed'])
+    assert [c.teacher for c in got] == ['Sara Ben', 'Nadia K', 'Mohamed Salah']
+    assert got[0].teaches_class and got[0].daily_load == 2 and got[1].daily_load == 0
+    assert 'Omar Ali' not in dm.free_at(0, 8)
+
+    dm.update_activity(dm.timetable_data['Omar Ali'][0].row, start_hour=12)
+    assert 'Omar Ali' in dm.free_at(0, 8)
+
+
+def test_query_cache_invalidated_by_generation(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV, encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    generation = dm.generation
+    grid = dm.build_teacher_grid('Ali Ahmed')
+    assert dm.build_teacher_grid('Ali Ahmed') is grid
+    assert dm.teacher_subjects('Ali Ahmed') == ['Math']
+    assert dm.stats()['teachers'] == 2 and dm.class_summaries() == [('4M1', 1, 1), ('4M2', 1, 1)]
+    assert dm.query_cache.hits == 1 and dm.query_cache.misses == 4
+
+    dm.update_activity(dm.timetable_data['Ali Ahmed'][0].row, start_hour=10)
+    assert dm.generation == generation + 1
+    assert dm.build_teacher_grid('Ali Ahmed') is not grid
+    p.write_text(SAMPLE_CSV + "3,الخميس,1,Math,Omar Ali,101,4M3\n", encoding='utf-8')
+    dm.import_fet_activities_csv_files([str(p)])
+    assert dm.stats()['teachers'] == 3 and dm.generation == generation + 2
+
+
+def test_timetable_versions_and_diff(tmp_path):
+    common, p10, p12 = tmp_path / "common.csv", tmp_path / "p10.csv", tmp_path / "p12.csv"
+    common.write_text("Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets\n"
+                      "9,الأحد,1,Sport,Omar Ali,200,4M3\n", encoding='utf-8')
+    p10.write_text(SAMPLE_CSV, encoding='utf-8')
+    p12.write_text(SAMPLE_CSV.replace("1,الاثنين,1", "1,الخميس,3").replace("2,الثلاثاء,2,Physics,Mohamed Salah",
+                                                                          "3,الثلاثاء,2,Art,Sara Amine"),
+                   encoding='utf-8')
+    dm = DataManager()
+    dm.load_version('مقترح10', [str(common), str(p10)])
+    dm.load_version('مقترح12', [str(common), str(p12)])
+    assert dm.versions == ['default', 'مقترح10', 'مقترح12']
+    assert 'Sara Amine' in dm.timetable_data and 'Mohamed Salah' not in dm.timetable_data
+    # the unchanged file's rows are shared, not imported twice
+    assert dm._versions['مقترح10']['_parsed_files'][str(common)] is dm._parsed_files[str(common)]
+    assert len(dm.activities) == 5
+
+    diff = dm.diff_versions('مقترح10', 'مقترح12')
+    [moved] = diff['teacher']['Ali Ahmed']
+    assert (moved.change, moved.subject, moved.other, moved.old_slot, moved.new_slot) == \
+        ('moved', 'Math', '4M1', (0, 8), (3, 10))
+    assert [c.change for c in diff['teacher']['Mohamed Salah']] == ['removed']
+    assert [c.change for c in diff['teacher']['Sara Amine']] == ['added']
+    assert [(c.change, c.other) for c in diff['class']['4M2']] == [('added', 'Sara Amine'),
+                                                                  ('removed', 'Mohamed Salah')]
+    assert 'Omar Ali' not in diff['teacher'] and '4M3' not in diff['class']
+
+    dm.switch_version('مقترح10')
+    assert 'Mohamed Salah' in dm.timetable_data and 'Sara Amine' not in dm.timetable_data
+    dm.drop_version('مقترح12')
+    assert dm.versions == ['default', 'مقترح10'] and dm._dead_rows == 2
+
+
+def test_editing_a_shared_file_leaves_other_versions_alone(tmp_path):
+    common, extra = tmp_path / "common.csv", tmp_path / "extra.csv"
+    common.write_text(SAMPLE_CSV, encoding='utf-8')
+    extra.write_text("Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets\n"
+                     "9,الأحد,1,Sport,Omar Ali,200,4M3\n", encoding='utf-8')
+    dm = DataManager()
+    dm.load_version('A', [str(common)])
+    dm.load_version('B', [str(common), str(extra)])
+    row = dm.timetable_data['Ali Ahmed'][0].row
+    new_row = dm.update_activity(row, start_hour=12)
+    assert new_row != row and dm.timetable_data['Ali Ahmed'][0].row == new_row
+    assert dm.activities_at('Ali Ahmed', 0, 12) and not dm.activities_at('Ali Ahmed', 0, 8)
+    # the edited copy is B's own: a version loaded later shares the unedited file
+    assert dm._parsed_files[str(common)] is not dm._versions['A']['_parsed_files'][str(common)]
+
+    generation = dm.generation
+    dm._stale_versions.add('A')     # as after a compaction: reindexed for the diff, not made current
+    [moved] = dm.diff_versions('A', 'B')['teacher']['Ali Ahmed']
+    assert (moved.change, moved.old_slot, moved.new_slot) == ('moved', (0, 8), (0, 12))
+    assert dm.generation == generation
+    dm.switch_version('A')
+    assert [(a['weekday'], a['start_hour']) for a in dm.timetable_data['Ali Ahmed']] == [(0, 8)]
+    dm.load_version('C', [str(common)])
+    assert dm._parsed_files[str(common)] is dm._versions['A']['_parsed_files'][str(common)]
+
+
+def test_schedule_shapes(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text(SAMPLE_CSV + "3,الاثنين,3,Math,Ali Ahmed,101,4M2\n"
+                              "4,الاثنين,6,Math,Ali Ahmed,101,4M3\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    shapes = dm.schedule_shapes()
+    ali = shapes['teacher']['Ali Ahmed']
+    # Monday 8h, 10h and 15h: a split day with one morning gap; lunch is not a gap
+    [monday] = ali.days
+    assert (monday.weekday, monday.first_hour, monday.last_hour, monday.span) == (0, 8, 15, 8)
+    assert (monday.gaps, monday.idle_hours, monday.split) == (1, 1, True)
+    assert (ali.gaps, ali.split_days, ali.max_span) == (1, 1, 8)
+    salah = shapes['teacher']['Mohamed Salah']
+    assert (salah.gaps, salah.idle_hours, salah.split_days, salah.max_span) == (0, 0, 0, 1)
+    assert set(shapes['class']) == {'4M1', '4M2', '4M3'}
+
 # End of project content
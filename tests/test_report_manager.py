@@ -0,0 +1,144 @@
+"""Tests for the attendance journal and its Excel export."""
+import datetime
+import sqlite3
+
+import pytest
+
+from report.periods import PERIOD_CUSTOM, PERIOD_MONTH, PERIOD_WEEK, PERIOD_YEAR, period_range
+from report.report_manager import HEADER, ReportManager
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def _workbook_rows(path):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [tuple(r) for r in wb.active.iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+
+def test_journal_append_and_export(tmp_path):
+    rm = ReportManager(str(tmp_path / "a.xlsx"), str(tmp_path / "a.db"), export_delay=None)
+    assert rm.append_row("2025-10-26", "Ali Ahmed", "غائب", "Math", "08:00")
+    assert rm.append_row("2025-10-27", "Omar Ali", "متأخر", "Art", "09:00", note="10 min")
+    assert len(rm.journal) == 2
+    assert not (tmp_path / "a.xlsx").exists()
+    assert rm.export_excel()
+    assert _workbook_rows(tmp_path / "a.xlsx") == [
+        tuple(HEADER),
+        (datetime.datetime(2025, 10, 26), "Ali Ahmed", "غائب", "Math", "08:00", None),
+        (datetime.datetime(2025, 10, 27), "Omar Ali", "متأخر", "Art", "09:00", "10 min")]
+    rm.close()
+
+    # reopening keeps the journal; the workbook is not imported a second time
+    rm = ReportManager(str(tmp_path / "a.xlsx"), str(tmp_path / "a.db"), export_delay=None)
+    assert len(rm.journal) == 2
+    rm.close()
+
+
+def test_append_rows_is_one_atomic_batch(tmp_path):
+    rm = ReportManager(str(tmp_path / "c.xlsx"), str(tmp_path / "c.db"), export_delay=None)
+    assert rm.append_rows([("2025-10-26", "Ali Ahmed", "غائب", "Math", "08:00"),
+                           ("2025-10-26", "Ali Ahmed", "غائب", "Math", "09:00", None),
+                           ("2025-10-26", "Omar Ali", "متأخر", "Art", "10:00", "5 min")])
+    assert len(rm.journal) == 3
+    # a bad record (missing teacher) rejects the whole batch
+    assert not rm.append_rows([("2025-10-27", "Ali Ahmed", "غائب", "Math", "08:00"),
+                               ("2025-10-27", None, "غائب", "Math", "09:00")])
+    assert len(rm.journal) == 3
+    rm.close()
+
+
+def test_report_filters_use_indexes(tmp_path):
+    rm = ReportManager(str(tmp_path / "q.xlsx"), str(tmp_path / "q.db"), export_delay=None)
+    rm.append_rows([("2025-10-27", "Ali Ahmed", "غائب", "Math", "08:00"),
+                    ("2025-10-26", "Ali Ahmed", "متأخر", "Physics", "09:00"),
+                    ("2025-11-02", "Ali Ahmed", "غائب", "Math", "08:00"),
+                    ("2025-10-26", "Omar Ali", "غائب", "Math", "10:00")])
+    october = rm.query(teacher="Ali Ahmed", date_range=period_range(PERIOD_MONTH, datetime.date(2025, 10, 15)))
+    assert [(r.date, r.subject) for r in october] == [(datetime.date(2025, 10, 26), "Physics"),
+                                                      (datetime.date(2025, 10, 27), "Math")]
+    until_october = (datetime.date(2025, 1, 1), datetime.date(2025, 10, 31))
+    assert [r.teacher for r in rm.query(subject="Math", date_range=until_october)] == ["Omar Ali", "Ali Ahmed"]
+    assert len(rm.query(type_str="غائب")) == 3
+    assert len(rm.query(teacher="Ali Ahmed", subject="Math")) == 2
+    plan = rm.journal.query_plan(teacher="Ali Ahmed", subject="Math", start_date=datetime.date(2025, 10, 1))
+    assert len(plan) == 1 and "USING INDEX attendance_teacher_date" in plan[0]
+    assert rm.generate_pdf_for_prof("Ali Ahmed", "اليوم", date_filter="not a date") is None
+    rm.close()
+
+
+def test_existing_workbook_is_imported(tmp_path):
+    old = tmp_path / "old.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.append(HEADER)
+    wb.active.append(["2025-10-26", "الأستاذة سعيدي", "حاضر", "رياضيات", "10:00", None])
+    wb.active.append(["الأحد الماضي", "الأستاذة سعيدي", "غائب", "رياضيات", "08:00", None])
+    wb.save(old)
+    rm = ReportManager(str(old), str(tmp_path / "j.db"), export_delay=None)
+    assert [tuple(r) for r in rm.journal.records()] == [
+        (datetime.date(2025, 10, 26), "الأستاذة سعيدي", "حاضر", "رياضيات", "10:00", ""),
+        ("الأحد الماضي", "الأستاذة سعيدي", "غائب", "رياضيات", "08:00", "")]
+    # the undated row is not reported but survives the export that replaces the workbook
+    assert len(rm.query(teacher="الأستاذة سعيدي")) == 1
+    assert rm.export_excel()
+    assert _workbook_rows(old)[2][0] == "الأحد الماضي"
+    rm.close()
+
+
+def test_failed_first_import_keeps_the_workbook(tmp_path):
+    old = tmp_path / "old.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.append(HEADER)
+    wb.active.append(["2025-10-26", "الأستاذة سعيدي", "حاضر", "رياضيات", "10:00", None])
+    wb.save(old)
+    content = old.read_bytes()
+    old.write_bytes(content[:len(content) // 2])
+    rm = ReportManager(str(old), str(tmp_path / "j.db"), export_delay=60)
+    assert not rm.journal.workbook_imported
+    rm.append_row("2025-10-27", "Ali Ahmed", "غائب", "Math", "08:00")
+    assert not rm.export_excel()
+    rm.close()
+    assert old.read_bytes() == content[:len(content) // 2]
+
+    # the journal exists now; the import is tried again once the file is readable
+    old.write_bytes(content)
+    rm = ReportManager(str(old), str(tmp_path / "j.db"), export_delay=None)
+    assert rm.journal.workbook_imported and len(rm.journal) == 2
+    assert rm.export_excel() and len(_workbook_rows(old)) == 3
+    rm.close()
+
+
+def test_background_export_flushed_on_close(tmp_path):
+    rm = ReportManager(str(tmp_path / "b.xlsx"), str(tmp_path / "b.db"), export_delay=60)
+    rm.append_row("2025-10-26", "Ali Ahmed", "غائب", "Math", "08:00")
+    rm.close()
+    assert len(_workbook_rows(tmp_path / "b.xlsx")) == 2
+
+
+def test_period_ranges():
+    today = datetime.date(2025, 10, 29)   # a Wednesday
+    assert period_range(PERIOD_WEEK, today) == (datetime.date(2025, 10, 26), datetime.date(2025, 11, 1))
+    assert period_range(PERIOD_MONTH, datetime.date(2024, 2, 10)) == (datetime.date(2024, 2, 1),
+                                                                       datetime.date(2024, 2, 29))
+    assert period_range(PERIOD_YEAR, today) == (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))
+    assert period_range(PERIOD_CUSTOM, today, datetime.date(2025, 11, 5), datetime.date(2025, 11, 1)) == \
+        (datetime.date(2025, 11, 1), datetime.date(2025, 11, 5))
+
+
+def test_string_dated_journal_is_migrated(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE attendance (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, "
+                 "teacher TEXT NOT NULL, type TEXT NOT NULL, subject TEXT NOT NULL, hour TEXT NOT NULL, "
+                 "note TEXT NOT NULL DEFAULT '')")
+    conn.executemany("INSERT INTO attendance (date, teacher, type, subject, hour) VALUES (?, ?, ?, ?, ?)",
+                     [("2025-10-26", "Ali Ahmed", "غائب", "Math", "08:00"),
+                      ("??", "Ali Ahmed", "غائب", "Math", "09:00")])
+    conn.commit()
+    conn.close()
+    rm = ReportManager(str(tmp_path / "old.xlsx"), str(path), export_delay=None)
+    # the undatable row is kept but never reported
+    assert [r.date for r in rm.query(teacher="Ali Ahmed")] == [datetime.date(2025, 10, 26)]
+    rm.close()
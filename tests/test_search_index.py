@@ -0,0 +1,33 @@
+"""Tests for the Arabic-aware type-ahead search index."""
+from core.data_manager import DataManager
+from core.search_index import SearchIndex
+
+
+def test_arabic_folding_and_titles():
+    index = SearchIndex()
+    for name in ('الأستاذة شنق', 'الأستاذ شعبان', 'الأستاذة العربي س'):
+        index.add('teacher', name)
+    index.add('subject', 'لغة عربية')
+    index.add('class', '4M1')
+    assert index.search('استاذه شنق') == [('teacher', 'الأستاذة شنق')]
+    assert index.search('ش') == [('teacher', 'الأستاذة شنق'), ('teacher', 'الأستاذ شعبان')]
+    assert index.search('عربيه') == [('subject', 'لغة عربية')]
+    assert index.search('4m') == [('class', '4M1')]
+    assert index.search('عربي', kinds=['teacher']) == [('teacher', 'الأستاذة العربي س')]
+    assert len(index.search('الأست', kinds=['teacher'])) == 3
+    assert index.search('الأستاذة شن') == [('teacher', 'الأستاذة شنق')]
+    index.discard('teacher', 'الأستاذة شنق')
+    assert index.search('شنق') == [] and index.search('ش') == [('teacher', 'الأستاذ شعبان')]
+
+
+def test_index_follows_imports(tmp_path):
+    p = tmp_path / "sample.csv"
+    p.write_text('Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets\n'
+                 '1,الاثنين,1,رياضيات,الأستاذة شنق,S1,4M1\n', encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    assert dm.search('s1') == [('room', 'S1')] and dm.search('شنق') == [('teacher', 'الأستاذة شنق')]
+    p.write_text('Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets\n'
+                 '1,الاثنين,1,رياضيات,الأستاذ نور,S2,4M1\n', encoding='utf-8')
+    dm.import_fet_activities_csv_files([str(p)])
+    assert dm.search('شنق') == [] and dm.search('s') == [('room', 'S2')]
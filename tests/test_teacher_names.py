@@ -0,0 +1,30 @@
+"""Tests for teacher-name canonicalization and the persistent alias table."""
+from core.teacher_names import TeacherNameCanonicalizer, teacher_key
+
+
+def test_spelling_variants_share_one_id():
+    names = TeacherNameCanonicalizer()
+    assert teacher_key('الأستاذة شنق عربية1') == teacher_key('الاستاذة  شنق عربيه') == teacher_key('شنق عربية')
+    first = names.split('الأستاذة شنق عربية1')
+    assert first == ('الأستاذة شنق',)
+    assert names.split('شنق عربية2 + الأستاذة شنق عربية1') == first
+    # two teachers whose short display name collides keep separate IDs
+    a, b = names.split('الأستاذة العربي س رياضيات4/الأستاذة العربي ج فرنسية6')
+    assert a == 'الأستاذة العربي' and b == 'الأستاذة العربي ج فرنسية'
+    # issued IDs are kept; a namesake spelled like one is numbered, never folded
+    assert names.split('الأستاذة شنق') == ('الأستاذة شنق (2)',)
+    assert names.split('الأستاذة العربي س رياضيات4') == (a,)
+
+
+def test_column_batch_and_alias_persistence(tmp_path):
+    names = TeacherNameCanonicalizer()
+    names.add_alias('طبوش انجليزية2', 'الأستاذ طبوش')
+    column = ['طبوش انجليزية2', 'Ali Ahmed', 'طبوش انجليزية2', 'Ali Ahmed']
+    assert names.split_column(column) == [('الأستاذ طبوش',), ('Ali Ahmed',)] * 2
+    assert names.misses == 2
+
+    path = str(tmp_path / 'aliases.json')
+    assert names.save(path)
+    reloaded = TeacherNameCanonicalizer.load(path)
+    assert reloaded.split('طبوش انجليزية') == ('الأستاذ طبوش',)
+    assert reloaded.split('Ali Ahmed') == ('Ali Ahmed',)
@@ -0,0 +1,50 @@
+"""Tests for the weekly workload tables, with and without NumPy."""
+import pytest
+
+import core.workload
+from core.data_manager import DataManager
+
+CSV = '''Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets,Duration
+1,الاثنين,1,Math,Ali Ahmed,101,4M1,2
+2,الاثنين,3,Physics,Ali Ahmed + Omar Ali,102,4M1_G1,1
+3,الثلاثاء,1,Math,Omar Ali,101,4M2,1
+4,Someday,1,Math,Omar Ali,101,4M2,1
+'''
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_workload_tables(tmp_path, monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(core.workload, 'np', None)
+    p = tmp_path / "sample.csv"
+    p.write_text(CSV, encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(p)])
+    w = dm.workload()
+    assert w.subjects == ['Math', 'Physics']
+    assert w.rows('teacher') == [('Ali Ahmed', 3), ('Omar Ali', 2)]
+    assert w.rows('teacher_subject') == [('Ali Ahmed', 'Math', 2), ('Ali Ahmed', 'Physics', 1),
+                                         ('Omar Ali', 'Math', 1), ('Omar Ali', 'Physics', 1)]
+    # the two-teacher Physics activity counts once for the class and the room
+    assert w.rows('class_subject') == [('4M1', 'Math', 2), ('4M1', 'Physics', 1), ('4M2', 'Math', 1)]
+    assert w.rows('room') == [('101', 3), ('102', 1)]
+    assert list(w.teacher_subject[0]) == [2, 1]
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_same_activity_id_in_two_files_counts_twice(tmp_path, monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(core.workload, 'np', None)
+    header = "Activity Id,Day,Hour,Subject,Teachers,Room,Students Sets\n"
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    a.write_text(header + "1,الاثنين,1,Math,Ali Ahmed,101,4M1\n", encoding='utf-8')
+    b.write_text(header + "1,الاثنين,1,Physics,Omar Ali,101,4M1\n", encoding='utf-8')
+    dm = DataManager()
+    dm.import_fet_activities_csv_files([str(a), str(b)])
+    w = dm.workload()
+    assert w.rows('class_subject') == [('4M1', 'Math', 1), ('4M1', 'Physics', 1)]
+    assert w.rows('room') == [('101', 2)]
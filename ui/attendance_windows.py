@@ -5,10 +5,11 @@ from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
-import datetime
 from typing import Optional, Dict, Any
 
 from core.data_manager import DataManager
+from report.attendance_journal import AttendanceRecord
+from report.periods import PERIOD_CUSTOM, PERIOD_MONTH, PERIODS, period_range
 from report.report_manager import ReportManager
 
 # Modern color scheme (matching main_ui.py)
@@ -96,10 +97,7 @@ class TeacherAttendanceWindow:
                 font=("Segoe UI", 11),
                 bg=BG).pack(side='left', padx=5)
                 
-        subjects = []
-        for subject, teachers in self.dm.materials_teachers.items():
-            if self.teacher in teachers:
-                subjects.append(subject)
+        subjects = list(self.dm.teacher_subjects(self.teacher))
                 
         self.subject_var = tk.StringVar(value=subjects[0] if subjects else "")
         subject_cb = ttk.Combobox(subject_frame,
@@ -118,15 +116,18 @@ class TeacherAttendanceWindow:
                 font=("Segoe UI", 11),
                 bg=BG).pack(side='left', padx=5)
                 
-        self.hour_var = tk.StringVar()
-        hours = ["08:00", "09:00", "10:00", "11:00", "12:00",
-                "13:00", "14:00", "15:00", "16:00", "17:00"]
-        hour_cb = ttk.Combobox(hour_frame,
-                              textvariable=self.hour_var,
-                              values=hours,
-                              width=10,
-                              state="readonly")
-        hour_cb.pack(side='left', padx=5)
+        # several hours can be selected; each becomes one record, saved together
+        self.hours = ["08:00", "09:00", "10:00", "11:00", "12:00",
+                      "13:00", "14:00", "15:00", "16:00", "17:00"]
+        self.hour_list = tk.Listbox(hour_frame,
+                                    selectmode='multiple',
+                                    exportselection=False,
+                                    height=5,
+                                    width=10,
+                                    font=("Segoe UI", 10))
+        for hour in self.hours:
+            self.hour_list.insert('end', hour)
+        self.hour_list.pack(side='left', padx=5)
         
         # Notes
         notes_frame = tk.Frame(self.top, bg=BG)
@@ -155,34 +156,66 @@ class TeacherAttendanceWindow:
         ttk.Button(btn_frame,
                   text="توليد تقرير",
                   command=self._show_report_window).pack(side='left', padx=5)
+
+        ttk.Button(btn_frame,
+                  text="اقتراح أستاذ بديل",
+                  command=self._suggest_substitutes).pack(side='left', padx=5)
     
     def _save_attendance(self):
-        """Save attendance record to Excel file."""
-        date_str = self.date_entry.get_date().strftime("%Y-%m-%d")
+        """Append one record per selected hour to the journal, in one write."""
+        date_value = self.date_entry.get_date()
         status = self.status_var.get()
         subject = self.subject_var.get()
-        hour = self.hour_var.get()
+        hours = self._selected_hours()
         notes = self.notes_text.get("1.0", "end-1c")
         
-        if not all([date_str, status, subject, hour]):
+        if not all([date_value, status, subject, hours]):
             messagebox.showerror("خطأ", "الرجاء ملء جميع الحقول المطلوبة")
             return
             
-        success = self.rm.append_row_to_excel(
-            date_str=date_str,
-            prof=self.teacher,
-            type_str=status,
-            matiere=subject,
-            hour_str=hour,
-            note=notes
+        success = self.rm.append_rows(
+            AttendanceRecord(date_value, self.teacher, status, subject, hour, notes)
+            for hour in hours
         )
         
         if success:
             messagebox.showinfo("نجاح", "تم حفظ المتابعة بنجاح")
             self.notes_text.delete("1.0", "end")
+            self.hour_list.selection_clear(0, 'end')
         else:
             messagebox.showerror("خطأ", "حدث خطأ أثناء حفظ المتابعة")
             
+    def _selected_hours(self):
+        return [self.hours[i] for i in self.hour_list.curselection()]
+
+    def _suggest_substitutes(self):
+        """List free colleagues for the selected date and (first) hour (e.g. for an absence)."""
+        hours = self._selected_hours()
+        if not hours:
+            messagebox.showerror("خطأ", "الرجاء اختيار الساعة")
+            return
+        weekday = self.date_entry.get_date().weekday()
+        hour_num = int(hours[0].split(":")[0])
+        sessions = self.dm.activities_at(self.teacher, weekday, hour_num)
+        class_name = sessions[0]['class'] if sessions else None
+        candidates = self.dm.find_substitutes(weekday, hour_num,
+                                              subject=self.subject_var.get() or None,
+                                              class_name=class_name,
+                                              exclude=[self.teacher])
+        if not candidates:
+            messagebox.showinfo("أستاذ بديل", "لا يوجد أستاذ متاح في هذه الساعة")
+            return
+        lines = []
+        for c in candidates[:10]:
+            tags = []
+            if c.teaches_subject:
+                tags.append("نفس المادة")
+            if c.teaches_class:
+                tags.append(f"يدرس {class_name}")
+            tags.append(f"{c.daily_load} ساعات في اليوم")
+            lines.append(f"{c.teacher} ({'، '.join(tags)})")
+        messagebox.showinfo("أستاذ بديل", "\n".join(lines))
+
     def _show_report_window(self):
         """Open report generation window for this teacher."""
         ReportGenerationWindow(self.top, self.teacher, self.dm, self.rm)
@@ -194,7 +227,7 @@ class ReportGenerationWindow:
     def __init__(self, parent: tk.Tk, teacher: str, dm: DataManager, rm: ReportManager):
         self.top = tk.Toplevel(parent)
         self.top.title(f"توليد تقرير: {teacher}")
-        self.top.geometry("500x400")
+        self.top.geometry("500x460")
         self.top.configure(bg=BG)
         
         self.teacher = teacher
@@ -223,14 +256,45 @@ class ReportGenerationWindow:
                 font=("Segoe UI", 11),
                 bg=BG).pack(side='left', padx=5)
                 
-        self.period_var = tk.StringVar(value="الشهر الحالي")
-        periods = ["اليوم", "الأسبوع الحالي", "الشهر الحالي", "السنة الحالية"]
+        self.period_var = tk.StringVar(value=PERIOD_MONTH)
         period_cb = ttk.Combobox(period_frame,
                                 textvariable=self.period_var,
-                                values=periods,
+                                values=PERIODS,
                                 width=20,
                                 state="readonly")
         period_cb.pack(side='left', padx=5)
+
+        # Custom period bounds
+        range_frame = tk.Frame(self.top, bg=BG)
+        range_frame.pack(fill='x', padx=20, pady=10)
+
+        tk.Label(range_frame,
+                text="من:",
+                font=("Segoe UI", 11),
+                bg=BG).pack(side='left', padx=5)
+        self.start_entry = DateEntry(range_frame,
+                                   width=12,
+                                   background=ACCENT,
+                                   foreground='white',
+                                   borderwidth=2)
+        self.start_entry.pack(side='left', padx=5)
+
+        tk.Label(range_frame,
+                text="إلى:",
+                font=("Segoe UI", 11),
+                bg=BG).pack(side='left', padx=5)
+        self.end_entry = DateEntry(range_frame,
+                                 width=12,
+                                 background=ACCENT,
+                                 foreground='white',
+                                 borderwidth=2)
+        self.end_entry.pack(side='left', padx=5)
+
+        tk.Label(range_frame,
+                text=f"({PERIOD_CUSTOM})",
+                font=("Segoe UI", 9),
+                bg=BG,
+                fg=TEXT_SECONDARY).pack(side='left', padx=5)
         
         # Subject Filter
         subject_frame = tk.Frame(self.top, bg=BG)
@@ -269,17 +333,16 @@ class ReportGenerationWindow:
         if subject == "كل المواد":
             subject = None
             
-        # Get date filter based on period
-        date_filter = None
-        today = datetime.date.today()
-        if period == "اليوم":
-            date_filter = today.strftime("%Y-%m-%d")
+        # Every period, custom included, becomes a (start, end) date range
+        date_range = period_range(period,
+                                  start=self.start_entry.get_date(),
+                                  end=self.end_entry.get_date())
         
         filename = self.rm.generate_pdf_for_prof(
             prof=self.teacher,
             periode=period,
             matiere=subject,
-            date_filter=date_filter
+            date_range=date_range
         )
         
         if filename:
@@ -76,7 +76,8 @@ class UIManager:
         for btn_text, cmd in [
             ("📅 استيراد جدول CSV", self.import_csv_and_refresh),
             ("🔍 التحقق من البيانات", self.verify_timetable_match),
-            ("🏫 عرض جميع الأقسام", self.open_classes_window)
+            ("🏫 عرض جميع الأقسام", self.open_classes_window),
+            ("📤 تصدير المتابعة Excel", self.export_attendance)
         ]:
             btn = tk.Button(top_controls, 
                           text=btn_text,
@@ -99,10 +100,11 @@ class UIManager:
         stats_frame = tk.Frame(main_container, bg=BG)
         stats_frame.pack(fill='x', pady=(0, 20))
         
+        counts = self.dm.stats()
         stats = [
-            ("📚 المواد", len(self.dm.materials_teachers)),
-            ("👨‍🏫 الأساتذة", len(self.dm.timetable_data)),
-            ("🏫 الأقسام", len(self.dm.classes_timetable))
+            ("📚 المواد", counts['subjects']),
+            ("👨‍🏫 الأساتذة", counts['teachers']),
+            ("🏫 الأقسام", counts['classes'])
         ]
         
         for label, count in stats:
@@ -130,6 +132,7 @@ class UIManager:
         # Left side - Subjects grid
         left = tk.Frame(main_frame, bg=BG)
         left.pack(side='left', fill='both', expand=True, padx=10)
+        subject_buttons = []
         
         if not self.dm.materials_teachers:
             empty_frame = tk.Frame(left, bg='white', bd=0)
@@ -166,6 +169,7 @@ class UIManager:
                          relief='flat', borderwidth=0)
                 btn.bind('<Enter>', lambda e, b=btn: b.configure(bg='#f8f9fa'))
                 btn.bind('<Leave>', lambda e, b=btn: b.configure(bg='white'))
+                subject_buttons.append((mat, btn))
                 
                 c += 1
                 if c >= cols:
@@ -181,6 +185,11 @@ class UIManager:
                 font=("Segoe UI", 12, "bold"),
                 bg='white',
                 fg=TEXT_PRIMARY).pack(pady=15)
+
+        # Type-ahead search: teachers, subjects, classes and rooms
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(right, textvariable=search_var, font=("Segoe UI", 10), justify='right')
+        search_entry.pack(fill='x', padx=10, pady=(0, 8))
         
         # Modern listbox with custom styling
         lb_frame = tk.Frame(right, bg='white')
@@ -210,6 +219,26 @@ class UIManager:
         for t in sorted(self.dm.timetable_data.keys()):
             lb.insert('end', t)
 
+        def on_search(evt=None):
+            text = search_var.get().strip()
+            if text:
+                teachers, subjects = self._search_teachers_and_subjects(text)
+            else:
+                teachers, subjects = sorted(self.dm.timetable_data.keys()), None
+            lb.delete(0, 'end')
+            for t in teachers:
+                lb.insert('end', t)
+            # keep the subjects grid in step with the search
+            i = 0
+            for mat, btn in subject_buttons:
+                if subjects is None or mat in subjects:
+                    btn.grid(row=i // cols, column=i % cols)
+                    i += 1
+                else:
+                    btn.grid_remove()
+
+        search_entry.bind('<KeyRelease>', on_search)
+
         def on_select_teacher(evt=None):
             sel = lb.curselection()
             if not sel: return
@@ -221,6 +250,25 @@ class UIManager:
         ttk.Button(right, text="استيراد CSV", command=self.import_csv_and_refresh).pack(pady=6)
         ttk.Button(right, text="عرض الأقسام", command=self.open_classes_window).pack(pady=6)
 
+    def _search_teachers_and_subjects(self, text: str):
+        """Teachers and subjects related to a search: teachers found by name or
+        through a matching subject, class or room, and the subjects they teach."""
+        teachers = {}
+        subjects = set()
+        for kind, name in self.dm.search(text, limit=None):
+            if kind == 'teacher':
+                teachers[name] = None
+            elif kind == 'subject':
+                subjects.add(name)
+                teachers.update(dict.fromkeys(self.dm.materials_teachers.get(name, [])))
+            elif kind == 'class':
+                teachers.update(dict.fromkeys(self.dm.classes_teachers.get(name, [])))
+            elif kind == 'room':
+                teachers.update(dict.fromkeys(a['teacher'] for a in self.dm.rooms_timetable.get(name, [])))
+        for t in teachers:
+            subjects.update(self.dm.teachers_subjects.get(t, []))
+        return list(teachers), subjects
+
     # ----- simplified windows (you can expand) -----
     def import_csv_and_refresh(self):
         file_paths = filedialog.askopenfilenames(title="استيراد جدول CSV من FET",
@@ -239,8 +287,18 @@ class UIManager:
                   f"عدد الأساتذة: {len(self.dm.timetable_data)}\n" \
                   f"عدد المواد: {len(self.dm.materials_teachers)}\n" \
                   f"عدد الأقسام: {len(self.dm.classes_timetable)}\n"
+        if self.dm.last_import_report is not None:
+            summary += "\n" + self.dm.last_import_report.summary()
+        cache = self.dm.query_cache.stats()
+        summary += f"\nذاكرة الاستعلامات: {cache['hits']} إصابة / {cache['misses']} إخفاق (الجيل {cache['generation']})"
         messagebox.showinfo("تحقق من البيانات", summary)
 
+    def export_attendance(self):
+        if self.rm.export_excel():
+            messagebox.showinfo("تصدير", f"تم تصدير المتابعة إلى\n{self.rm.excel_path}")
+        else:
+            messagebox.showerror("خطأ", "حدث خطأ أثناء تصدير ملف Excel")
+
     def open_classes_window(self):
         if not self.dm.classes_timetable:
             messagebox.showinfo("معلومة", "لم يتم استيراد أي بيانات عن الأقسام بعد")
@@ -249,9 +307,7 @@ class UIManager:
         tk.Label(top, text="🏫 جميع الأقسام", font=("Arial", 16, "bold"), bg=BG).pack(pady=12)
         lb = tk.Listbox(top, width=60, height=25)
         lb.pack(padx=8, pady=8, fill='both', expand=True)
-        for class_name in sorted(self.dm.classes_timetable.keys()):
-            teachers_count = len(self.dm.classes_teachers.get(class_name, []))
-            activities_count = len(self.dm.classes_timetable.get(class_name, []))
+        for class_name, teachers_count, activities_count in self.dm.class_summaries():
             lb.insert('end', f"{class_name} ({teachers_count} أستاذ - {activities_count} حصة)")
 
     def open_material_window(self, matiere: str):